@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogapi.settings")
+# Async views run their queries in threads which do not outlive the request,
+# so persistent connections would never be reused nor closed. Connections are
+# closed after every request unless DB_CONN_MAX_AGE is set in the environment,
+# which a .env file cannot do as it never overrides it.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -0,0 +1,177 @@
+# src/blogapi/middleware.py
+"""Compression of response bodies.
+
+``CompressionMiddleware`` encodes responses with the best encoding the client
+accepts among ``COMPRESSION_ENCODINGS``: gzip always, brotli and zstd when the
+``brotli`` and ``zstandard`` packages are installed. Bodies smaller than
+``COMPRESSION_MIN_SIZE`` bytes are sent as they are, compressing them saves
+less than it costs.
+
+Streaming responses, such as ``/api/posts/export/``, are compressed as they
+are produced without being buffered; compressed output is sent whenever the
+compressor emits some.
+
+Only the content types of ``COMPRESSION_TYPES``, the API's JSON and NDJSON,
+are compressed. HTML pages such as the admin and the browsable API carry
+CSRF tokens, which compression would expose to BREACH; event streams need
+every event delivered at once, which the compressor's buffering would delay.
+"""
+
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional encoding
+    zstandard = None
+
+# Levels trading ratio for speed, as suits bodies compressed on every request.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+accept_encoding_re = re.compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*")
+
+
+class GzipCompressor:
+    def __init__(self):
+        # 16 + MAX_WBITS writes the gzip header and trailer.
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def get_compressors() -> dict:
+    """Compressor classes by encoding, for the installed libraries."""
+    compressors = {"gzip": GzipCompressor}
+    if brotli is not None:
+        compressors["br"] = BrotliCompressor
+    if zstandard is not None:
+        compressors["zstd"] = ZstdCompressor
+    return compressors
+
+
+def negotiate_encoding(accept_encoding: str, encodings) -> str | None:
+    """Return the first of ``encodings`` with the highest quality the client accepts."""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        match = accept_encoding_re.fullmatch(part)
+        if match is None:
+            continue
+        name, quality = match.groups()
+        try:
+            qualities[name.lower()] = float(quality) if quality is not None else 1.0
+        except ValueError:
+            continue
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_sequence(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(chunks, compressor):
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with the best encoding accepted by the client.
+
+    Like Django's ``GZipMiddleware``, it should come before any middleware
+    reading or changing response bodies.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in settings.COMPRESSION_TYPES:
+            return response
+        if "no-transform" in response.get("Cache-Control", ""):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        # The encoding depends on the request headers, tell caches so.
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        compressors = get_compressors()
+        encoding = negotiate_encoding(
+            request.headers.get("Accept-Encoding", ""),
+            [name for name in settings.COMPRESSION_ENCODINGS if name in compressors],
+        )
+        if encoding is None:
+            return response
+        compressor = compressors[encoding]()
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_sequence(
+                    response.streaming_content, compressor
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, compressor
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The representation changed, so a strong ETag no longer matches it.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,95 @@
+# src/blogapi/routers.py
+"""Routing of reads to database replicas.
+
+``DATABASE_REPLICAS`` maps replica aliases to their weights. Reads go to the
+replicas only within ``replica_reads()``, which views enter for requests
+that may see slightly stale data; all other reads and every write go to the
+``default`` database, the primary. Replicas take turns by smooth weighted
+round-robin, so with equal weights it is plain round-robin and a weight of 0
+takes a replica out of rotation.
+
+Replicas lag behind the primary, so a client which has just written is
+pinned to the primary for ``DATABASE_REPLICA_PIN_SECONDS`` with
+``pin_to_primary()`` to read its own writes.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def start_replica_reads() -> Token:
+    return _replica_reads.set(True)
+
+
+def stop_replica_reads(token: Token) -> None:
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads of the enclosed code to the replicas."""
+    token = start_replica_reads()
+    try:
+        yield
+    finally:
+        stop_replica_reads(token)
+
+
+def pin_key(ident) -> str:
+    return f"db:pinned:{ident}"
+
+
+def pin_to_primary(ident) -> None:
+    """Serve the reads of the client ``ident`` from the primary for a while."""
+    if settings.DATABASE_REPLICAS:
+        cache.set(pin_key(ident), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(ident) -> bool:
+    return bool(settings.DATABASE_REPLICAS) and cache.get(pin_key(ident), False)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current_weights = {}
+
+    def next_replica(self) -> str | None:
+        """Return the replica whose turn it is, ``None`` without replicas."""
+        weights = {alias: w for alias, w in settings.DATABASE_REPLICAS.items() if w > 0}
+        if not weights:
+            return None
+        total = sum(weights.values())
+        with self.lock:
+            for alias, weight in weights.items():
+                self.current_weights[alias] = self.current_weights.get(alias, 0) + weight
+            chosen = max(weights, key=self.current_weights.__getitem__)
+            self.current_weights[chosen] -= total
+        return chosen
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        # Related objects come from the database their instance was read from.
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return self.next_replica()
+
+    def db_for_write(self, model, **hints):
+        # Also for instances read from a replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
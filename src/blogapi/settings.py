@@ -10,11 +10,25 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Environment variables win over the values of a local .env file, see
+# .env.example for the supported ones.
+load_dotenv(BASE_DIR / ".env")
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -47,6 +61,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "blogapi.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -79,13 +94,115 @@ WSGI_APPLICATION = "blogapi.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+
+# Keep connections open between requests instead of connecting per request,
+# checking them before reuse so a dropped connection is replaced.
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+DB_CONN_HEALTH_CHECKS = env_bool("DB_CONN_HEALTH_CHECKS", True)
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "blogapi"),
+            "USER": os.environ.get("DB_USER", ""),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", ""),
+            "PORT": os.environ.get("DB_PORT", ""),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+            "OPTIONS": {},
+        }
+    }
+    if env_bool("DB_POOL", False):
+        # psycopg 3 connection pool, which replaces persistent connections.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+            "OPTIONS": {
+                # WAL lets readers run alongside a writer; NORMAL synchronous
+                # is safe with WAL and avoids an fsync per transaction.
+                "init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+                # Take the write lock when a transaction starts, so writers
+                # wait for each other up to the timeout instead of failing
+                # with "database is locked" halfway through.
+                "transaction_mode": "IMMEDIATE",
+                "timeout": float(os.environ.get("DB_SQLITE_TIMEOUT", 20)),
+            },
+        }
+    }
+else:
+    raise ValueError(f"Unsupported DB_ENGINE {DB_ENGINE!r}, use sqlite or postgresql.")
+
+# Read replicas, see blogapi.routers. DB_REPLICAS lists their hosts with
+# postgresql or their files with sqlite, DB_REPLICA_WEIGHTS their shares of
+# the reads (default: equal). Replicas are configured like the primary
+# otherwise and become the aliases replica_1, replica_2, ...
+DB_REPLICAS = [
+    name.strip() for name in os.environ.get("DB_REPLICAS", "").split(",") if name.strip()
+]
+DB_REPLICA_WEIGHTS = [
+    int(weight) for weight in os.environ.get("DB_REPLICA_WEIGHTS", "").split(",") if weight.strip()
+] or [1] * len(DB_REPLICAS)
+if len(DB_REPLICA_WEIGHTS) != len(DB_REPLICAS):
+    raise ValueError("DB_REPLICA_WEIGHTS needs one weight per replica of DB_REPLICAS.")
+
+DATABASE_REPLICAS = {}
+for number, (replica, weight) in enumerate(zip(DB_REPLICAS, DB_REPLICA_WEIGHTS), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST" if DB_ENGINE == "postgresql" else "NAME": replica,
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        # Tests read and write one database.
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS[alias] = weight
+
+DATABASE_ROUTERS = ["blogapi.routers.ReplicaRouter"]
+# Seconds a client reads from the primary after a write, to cover the lag of
+# the replicas.
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# The feed version and the post detail cache must be shared by every process
+# serving the API, which takes redis or memcached; locmem is per process.
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(
+        f"Unsupported CACHE_BACKEND {CACHE_BACKEND!r}, use {', '.join(CACHE_BACKENDS)}."
+    )
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
+# Seconds a rendered feed page is kept; pages are also invalidated on writes.
+POSTS_FEED_CACHE_TIMEOUT = 300
+# Seconds a post detail representation is kept, see posts.cache.
+POSTS_DETAIL_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -122,6 +239,42 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Serve STATIC_ROOT with WhiteNoise, for deployments without a web server in
+# front to serve it. Needs the whitenoise package and collectstatic.
+STATIC_SERVE = env_bool("STATIC_SERVE", False)
+if STATIC_SERVE:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "whitenoise.middleware.WhiteNoiseMiddleware",
+    )
+
+# Link static files under names with a hash of their content, so they can be
+# cached for good. The names are only known once collectstatic has run;
+# until then every page linking a static file fails, so deployments running
+# collectstatic opt in. Serving with WhiteNoise also stores compressed copies.
+STATIC_MANIFEST = env_bool("STATIC_MANIFEST", STATIC_SERVE)
+if STATIC_SERVE:
+    STATICFILES_BACKEND = "whitenoise.storage.CompressedStaticFilesStorage"
+    if STATIC_MANIFEST:
+        STATICFILES_BACKEND = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+elif STATIC_MANIFEST:
+    STATICFILES_BACKEND = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+else:
+    STATICFILES_BACKEND = "django.contrib.staticfiles.storage.StaticFilesStorage"
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": STATICFILES_BACKEND},
+}
+
+# Response compression, see blogapi.middleware. Encodings in order of
+# preference, the ones whose library is not installed are skipped.
+COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+# Smaller bodies are sent uncompressed.
+COMPRESSION_MIN_SIZE = 1024
+# Only API responses are compressed, never HTML with CSRF tokens (BREACH).
+COMPRESSION_TYPES = ["application/json", "application/x-ndjson"]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -129,3 +282,41 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "accounts.CustomUser"
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    "PAGE_SIZE": 20,
+    "DEFAULT_THROTTLE_CLASSES": [
+        "posts.throttling.UserBurstRateThrottle",
+        "posts.throttling.UserSustainedRateThrottle",
+        "posts.throttling.AnonBurstRateThrottle",
+        "posts.throttling.AnonSustainedRateThrottle",
+        "posts.throttling.WriteRateThrottle",
+    ],
+    # Counted in the default cache, which must be shared by all processes
+    # for the limits to hold; a rate of None disables a scope.
+    "DEFAULT_THROTTLE_RATES": {
+        "user_burst": "300/min",
+        "user_sustained": "20000/day",
+        "anon_burst": "120/min",
+        "anon_sustained": "5000/day",
+        "comment_write": "20/min",
+    },
+}
+
+# Pagination classes are set per viewset, PAGE_SIZE is only their default size.
+SILENCED_SYSTEM_CHECKS = ["rest_framework.W001"]
+
+# Broker delivering new comments to the comment streams, see posts.pubsub.
+# LocalBroker only reaches subscribers of the same process.
+POSTS_PUBSUB_BACKEND = "posts.pubsub.LocalBroker"
+# Messages buffered per subscriber before it has to catch up from the database.
+POSTS_PUBSUB_QUEUE_SIZE = 100
+# Seconds between keep-alive comments on idle event streams.
+POSTS_STREAM_KEEPALIVE = 15
+
+# Serve post, comment and tag lists from .values() rows rendered with orjson
+# instead of going through the serializers. The output is the same.
+POSTS_FAST_LISTS = False
@@ -0,0 +1,305 @@
+# src/posts/async_views.py
+"""Native async read views for posts, comments and tags, served under ``/api/async/``.
+
+DRF views are synchronous, so under ASGI every request to them is handed to
+a worker thread. These views query with the async ORM instead and build
+their output from the ``rows`` representations, so items are the same as
+those of the synchronous API:
+
+- lists are keyset paginated on the ordering of the synchronous viewsets
+  and return ``{"next": ..., "results": [...]}``; follow ``next`` to walk the
+  pages, ``page_size`` selects the page size as usual;
+- list filters are the synchronous filter backends, which only build
+  querysets;
+- the default throttles apply, counted with the async cache API.
+
+``post_comment_stream`` pushes new comments of a post as server-sent
+events. It needs the project served under ASGI (``blogapi.asgi``, e.g. with
+uvicorn); under WSGI, ``runserver`` included, it answers 501.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import exceptions
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBase, StreamingHttpResponse
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotFound,
+    Throttled,
+    ValidationError,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .filters import CommentFilterBackend, PostFilterBackend
+from .models import Comment, Post, Tag
+from .pagination import CommentPagination, KeysetPagination, PostPagination, TagPagination
+from .pubsub import OVERFLOW, comments_channel, get_broker
+from .renderers import FastJSONRenderer
+from .rows import (
+    COMMENT_VALUES,
+    POST_SUMMARY_VALUES,
+    POST_VALUES,
+    TAG_VALUES,
+    comment_row,
+    post_row,
+    post_summary_row,
+    tag_row,
+)
+
+class ASGIRequired(APIException):
+    status_code = 501
+    default_detail = "This endpoint is only available when served under ASGI."
+    default_code = "asgi_required"
+
+
+def json_response(data, status=200, headers=None) -> HttpResponse:
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        headers=headers,
+        content_type="application/json",
+    )
+
+
+def error_response(exc: APIException) -> HttpResponse:
+    # Same body and headers as DRF's exception handler.
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    headers = {}
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = str(exc.wait)
+    if isinstance(exc, MethodNotAllowed):
+        headers["Allow"] = ", ".join(SAFE_METHODS)
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+async def check_throttles(request: Request):
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if hasattr(throttle, "aallow_request"):
+            allowed = await throttle.aallow_request(request, None)
+        else:
+            allowed = await sync_to_async(throttle.allow_request)(request, None)
+        if not allowed:
+            raise Throttled(throttle.wait())
+
+
+def async_api_view(view):
+    """Run ``view`` with a DRF request and render its data or API error as JSON.
+
+    Responses returned by ``view`` are passed through as they are.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method not in SAFE_METHODS:
+                raise MethodNotAllowed(request.method)
+            if request.method == "OPTIONS":
+                return HttpResponse(headers={"Allow": ", ".join(SAFE_METHODS)})
+            request = Request(
+                request,
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            # The configured authenticators are synchronous, as in DRF views.
+            await sync_to_async(getattr)(request, "user")
+            await check_throttles(request)
+            data = await view(request, *args, **kwargs)
+        except APIException as exc:
+            return error_response(exc)
+        if isinstance(data, HttpResponseBase):
+            return data
+        return json_response(data)
+
+    return wrapper
+
+
+def get_page_size(request: Request) -> int:
+    return KeysetPagination().get_page_size(request)
+
+
+def encode_cursor(position: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, default=str).encode()).decode()
+
+
+def decode_cursor(request: Request, model, ordering) -> list | None:
+    cursor = request.query_params.get("cursor")
+    if cursor is None:
+        return None
+    fields = [model._meta.get_field(name.lstrip("-")) for name in ordering]
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(position) != len(fields):
+            raise ValueError(position)
+        return [field.to_python(value) for field, value in zip(fields, position)]
+    except (ValueError, TypeError, binascii.Error, exceptions.ValidationError):
+        raise NotFound("Invalid cursor")
+
+
+def after(ordering, position) -> Q:
+    """Condition selecting the rows ordered after ``position``."""
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, position):
+        lookup = "lt" if name.startswith("-") else "gt"
+        name = name.lstrip("-")
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+async def keyset_page(request: Request, queryset, ordering, values, row) -> dict:
+    page_size = get_page_size(request)
+    position = decode_cursor(request, queryset.model, ordering)
+    if position is not None:
+        queryset = queryset.filter(after(ordering, position))
+    fields = [name.lstrip("-") for name in ordering]
+    queryset = queryset.order_by(*ordering).values(*dict.fromkeys([*values, *fields]))
+    rows = [values async for values in queryset[: page_size + 1].aiterator()]
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        query = request.query_params.copy()
+        query["cursor"] = encode_cursor([rows[-1][name] for name in fields])
+        next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+    return {"next": next_url, "results": [row(values) for values in rows]}
+
+
+async def get_values(queryset, values, pk) -> dict:
+    try:
+        return await queryset.values(*values).aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        raise NotFound(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+@async_api_view
+async def post_list(request):
+    queryset = PostFilterBackend().filter_queryset(request, Post.objects.summarized(), None)
+    return await keyset_page(
+        request, queryset, PostPagination.ordering, POST_SUMMARY_VALUES, post_summary_row
+    )
+
+
+@async_api_view
+async def post_detail(request, pk):
+    values = await get_values(Post.objects.all(), POST_VALUES, pk)
+    tags = [tag_row(t) async for t in Tag.objects.filter(posts=pk).values(*TAG_VALUES)]
+    return post_row(values, tags)
+
+
+@async_api_view
+async def post_comment_list(request, post_pk):
+    if not await Post.objects.filter(pk=post_pk).aexists():
+        raise NotFound("Post not found.")
+    queryset = CommentFilterBackend().filter_queryset(
+        request, Comment.objects.filter(post_id=post_pk), None
+    )
+    return await keyset_page(
+        request, queryset, CommentPagination.ordering, COMMENT_VALUES, comment_row
+    )
+
+
+@async_api_view
+async def comment_list(request):
+    queryset = CommentFilterBackend().filter_queryset(request, Comment.objects.all(), None)
+    return await keyset_page(
+        request, queryset, CommentPagination.ordering, COMMENT_VALUES, comment_row
+    )
+
+
+@async_api_view
+async def comment_detail(request, pk):
+    return comment_row(await get_values(Comment.objects.all(), COMMENT_VALUES, pk))
+
+
+@async_api_view
+async def tag_list(request):
+    return await keyset_page(
+        request, Tag.objects.all(), TagPagination.ordering, TAG_VALUES, tag_row
+    )
+
+
+@async_api_view
+async def tag_detail(request, pk):
+    return tag_row(await get_values(Tag.objects.all(), TAG_VALUES, pk))
+
+
+def comment_event(row: dict) -> bytes:
+    data = FastJSONRenderer().render(row).decode()
+    return f"id: {row['id']}\nevent: comment\ndata: {data}\n\n".encode()
+
+
+def get_last_event_id(request: Request) -> int | None:
+    value = request.headers.get("Last-Event-ID", request.query_params.get("last_event_id"))
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({"Last-Event-ID": ["Expected a comment id."]})
+
+
+async def comment_events(post_pk: int, last_id: int | None):
+    """Yield new comments of a post as events, oldest first.
+
+    The subscription is opened before missed comments are read from the
+    database, so no comment falls between the two; comments arriving from
+    both are skipped by id. After an overflow, the dropped comments are read
+    from the database too.
+    """
+    async with get_broker().subscribe(comments_channel(post_pk)) as subscription:
+        if last_id is None:
+            latest = await Comment.objects.filter(post_id=post_pk).order_by("-id").afirst()
+            last_id = latest.pk if latest else 0
+        message = OVERFLOW
+        while True:
+            if message is OVERFLOW:
+                missed = (
+                    Comment.objects.filter(post_id=post_pk, pk__gt=last_id)
+                    .order_by("pk")
+                    .values(*COMMENT_VALUES)
+                )
+                async for values in missed.aiterator():
+                    yield comment_event(comment_row(values))
+                    last_id = values["id"]
+            elif message is not None and message["id"] > last_id:
+                yield comment_event(message)
+                last_id = message["id"]
+            try:
+                message = await asyncio.wait_for(
+                    subscription.get(), settings.POSTS_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                message = None
+                yield b": keep-alive\n\n"
+
+
+@async_api_view
+async def post_comment_stream(request, post_pk):
+    """New comments of a post as server-sent events.
+
+    Reconnecting clients send the id of the last comment they received in
+    ``Last-Event-ID`` (or ``?last_event_id=``) and get the comments they
+    missed first.
+    """
+    # A WSGI server would consume the endless stream before sending it.
+    if not isinstance(request._request, ASGIRequest):
+        raise ASGIRequired()
+    last_id = get_last_event_id(request)
+    if not await Post.objects.filter(pk=post_pk).aexists():
+        raise NotFound("Post not found.")
+    return StreamingHttpResponse(
+        comment_events(post_pk, last_id),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,126 @@
+# src/posts/cache.py
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+FEED_VERSION_KEY = "posts:feed:version"
+
+
+def get_feed_version() -> int:
+    """Return the current version of the published-posts feed.
+
+    Cached feed pages are keyed by this version, so bumping it makes every
+    previously cached page unreachable without having to enumerate them.
+    """
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a version evicted from the cache is never
+        # reused while pages cached under it may still be around.
+        cache.add(FEED_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def bump_feed_version() -> None:
+    """Invalidate all cached feed pages."""
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        get_feed_version()
+
+
+def feed_cache_key(url: str) -> str:
+    """Key of the feed page at ``url`` under the current feed version.
+
+    Take the key before reading the page from the database and store the
+    page under that same key: a write bumping the version meanwhile then
+    leaves the page under the old, unreachable version.
+    """
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f"posts:feed:{get_feed_version()}:{digest}"
+
+
+def get_feed_page(key: str):
+    return cache.get(key)
+
+
+def set_feed_page(key: str, data) -> None:
+    cache.set(key, data, settings.POSTS_FEED_CACHE_TIMEOUT)
+
+
+# Post detail representations are cached per post together with the
+# ``updated_at`` they were serialized at. Everything shown in the
+# representation moves ``updated_at``, so an entry whose timestamp differs
+# from the post's current one is stale and treated as a miss; entries are
+# also deleted on writes so they do not linger.
+POST_DETAIL_STATS_KEYS = {"hits": "posts:detail:hits", "misses": "posts:detail:misses"}
+# Seconds one request may hold the right to serialize a post.
+POST_DETAIL_LOCK_TIMEOUT = 5
+# Seconds other requests wait for that result before serializing themselves.
+POST_DETAIL_LOCK_WAIT = 0.5
+POST_DETAIL_POLL_INTERVAL = 0.01
+
+
+def post_detail_key(pk) -> str:
+    return f"posts:detail:{pk}"
+
+
+def count_post_detail(outcome: str) -> None:
+    key = POST_DETAIL_STATS_KEYS[outcome]
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def get_post_detail_stats() -> dict[str, int]:
+    """Hits and misses of the post detail cache since the counters were reset."""
+    values = cache.get_many(POST_DETAIL_STATS_KEYS.values())
+    return {outcome: values.get(key, 0) for outcome, key in POST_DETAIL_STATS_KEYS.items()}
+
+
+def reset_post_detail_stats() -> None:
+    cache.delete_many(POST_DETAIL_STATS_KEYS.values())
+
+
+def get_post_detail(pk, updated_at, serialize):
+    """Return the cached representation of a post, serializing it on a miss.
+
+    ``serialize()`` runs in one request at a time per post: the request
+    which ``add()``s the post's lock serializes and caches the post while
+    concurrent requests wait up to ``POST_DETAIL_LOCK_WAIT`` seconds for the
+    result, so a popular post expiring does not stampede the database.
+    """
+    key = post_detail_key(pk)
+    version = updated_at.isoformat()
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        count_post_detail("hits")
+        return entry[1]
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, POST_DETAIL_LOCK_TIMEOUT):
+        deadline = time.monotonic() + POST_DETAIL_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(POST_DETAIL_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry[0] == version:
+                count_post_detail("hits")
+                return entry[1]
+        # The other request is slow or failed, do not wait any longer.
+        count_post_detail("misses")
+        return serialize()
+    try:
+        count_post_detail("misses")
+        data = serialize()
+        cache.set(key, (version, data), settings.POSTS_DETAIL_CACHE_TIMEOUT)
+        return data
+    finally:
+        cache.delete(lock_key)
+
+
+def delete_post_details(pks) -> None:
+    cache.delete_many([post_detail_key(pk) for pk in pks])
@@ -0,0 +1,100 @@
+# src/posts/filters.py
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import PostState, PostTag
+
+# Upper bound of ``tag`` names, each one may become an EXISTS subquery.
+MAX_FILTER_TAGS = 10
+
+
+def parse_datetime_param(request, name):
+    """Return the ``name`` query parameter as an aware datetime, if given."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        # None when malformed, ValueError when impossible, e.g. February 30th.
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ["Expected an ISO 8601 date and time."]})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class PostFilterBackend(BaseFilterBackend):
+    """Filter posts by query parameters.
+
+    ``state``
+        Only posts in the given state, one of ``PostState``.
+    ``author``
+        Only posts written by the user with the given id.
+    ``created_after``, ``created_before``
+        Only posts created after, respectively before, the given ISO 8601
+        date and time.
+    ``tag``
+        Only posts tagged with the given comma separated tag names, all of
+        them or, with ``tag_match=any``, at least one of them.
+
+    Every filter is a condition of the single list query; tags are matched
+    with ``EXISTS`` subqueries over ``PostTag`` so posts are never
+    duplicated by a join.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        state = request.query_params.get("state")
+        if state is not None:
+            if state not in PostState.values:
+                raise ValidationError({"state": [f"Expected one of {PostState.values}."]})
+            queryset = queryset.filter(state=state)
+        author = request.query_params.get("author")
+        if author is not None:
+            if not (author.isascii() and author.isdigit()):
+                raise ValidationError({"author": ["Expected a user id."]})
+            queryset = queryset.filter(author_id=int(author))
+        created_after = parse_datetime_param(request, "created_after")
+        if created_after is not None:
+            queryset = queryset.filter(created_at__gt=created_after)
+        created_before = parse_datetime_param(request, "created_before")
+        if created_before is not None:
+            queryset = queryset.filter(created_at__lt=created_before)
+        return self.filter_tags(request, queryset)
+
+    def filter_tags(self, request, queryset):
+        value = request.query_params.get("tag")
+        match = request.query_params.get("tag_match", "all")
+        if match not in ("all", "any"):
+            raise ValidationError({"tag_match": ["Expected one of ['all', 'any']."]})
+        if value is None:
+            return queryset
+        names = sorted({name.strip() for name in value.split(",") if name.strip()})
+        if not names or len(names) > MAX_FILTER_TAGS:
+            raise ValidationError(
+                {"tag": [f"Expected between 1 and {MAX_FILTER_TAGS} tag names."]}
+            )
+        links = PostTag.objects.filter(post=OuterRef("pk"))
+        if match == "any":
+            return queryset.filter(Exists(links.filter(tag__name__in=names)))
+        return queryset.filter(*(Exists(links.filter(tag__name=name)) for name in names))
+
+
+class CommentFilterBackend(BaseFilterBackend):
+    """Filter comments by query parameters.
+
+    ``since``
+        Only comments created after the given ISO 8601 date and time, for
+        clients polling for new comments.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        since = parse_datetime_param(request, "since")
+        if since is not None:
+            queryset = queryset.filter(created_at__gt=since)
+        return queryset
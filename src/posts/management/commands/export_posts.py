@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.ndjson import CHUNK_SIZE, export_posts
+
+
+class Command(BaseCommand):
+    help = "Export posts with their tags and comments as newline-delimited JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="File to write to (default: standard output).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help=f"Number of posts fetched per query (default: {CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, output, chunk_size, **options):
+        lines = export_posts(Post.objects.all(), chunk_size=chunk_size)
+        if output is None:
+            # Write through the command's stdout so it can be redirected.
+            for line in lines:
+                self.stdout.write(line.decode(), ending="")
+            return
+        count = 0
+        with open(output, "wb") as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stderr.write(f"Exported {count} posts to {output}")
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.ndjson import BATCH_SIZE, NDJSONImportError, import_posts
+
+
+class Command(BaseCommand):
+    help = "Import posts with their tags and comments from newline-delimited JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file as written by export_posts.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help=f"Number of posts inserted per transaction (default: {BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+        started = time.perf_counter()
+        try:
+            with open(path, encoding="utf-8") as f:
+                count = import_posts(
+                    f,
+                    batch_size=batch_size,
+                    progress=lambda done: self.stdout.write(f"Imported {done} posts..."),
+                )
+        except (OSError, NDJSONImportError) as e:
+            raise CommandError(str(e)) from e
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {count} posts from {path} in {elapsed:.1f}s ({rate:.0f} posts/s)"
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comment_count and Post.last_commented_at from comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts updated per query (default: 1000).",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        done = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            Post.objects.filter(pk__in=pks).refresh_comment_stats()
+            done += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write(f"Recomputed comment statistics of {done} posts")
+        self.stdout.write(self.style.SUCCESS(f"Done, {done} posts recomputed."))
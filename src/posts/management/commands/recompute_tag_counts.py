@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Tag
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag.post_count from post links."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tags updated per query (default: 1000).",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        done = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Tag.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            Tag.objects.filter(pk__in=pks).refresh_post_counts()
+            done += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write(f"Recomputed post counts of {done} tags")
+        self.stdout.write(self.style.SUCCESS(f"Done, {done} tags recomputed."))
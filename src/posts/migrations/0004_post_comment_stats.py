@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def compute_comment_stats(apps, schema_editor):
+    Comment = apps.get_model("posts", "Comment")
+    Post = apps.get_model("posts", "Post")
+    comments = Comment.objects.filter(post=OuterRef("pk")).order_by()
+    Post.objects.update(
+        comment_count=Coalesce(
+            Subquery(comments.values("post").annotate(count=Count("pk")).values("count")), 0
+        ),
+        last_commented_at=Subquery(comments.order_by("-created_at").values("created_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0003_post_comment_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="last_commented_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(compute_comment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def compute_post_counts(apps, schema_editor):
+    PostTag = apps.get_model("posts", "PostTag")
+    Tag = apps.get_model("posts", "Tag")
+    links = PostTag.objects.filter(tag=OuterRef("pk")).order_by()
+    Tag.objects.update(
+        post_count=Coalesce(
+            Subquery(links.values("tag").annotate(count=Count("pk")).values("count")), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0004_post_comment_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="post_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["-post_count", "name"], name="tag_post_count_idx"
+            ),
+        ),
+        migrations.RunPython(compute_post_counts, migrations.RunPython.noop),
+    ]
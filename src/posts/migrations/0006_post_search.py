@@ -0,0 +1,84 @@
+from django.db import migrations
+
+# External content FTS5 table over posts_post; the triggers keep it in sync
+# with every write, including bulk inserts and queryset updates.
+# Migrations rebuilding posts_post on SQLite drop the triggers; they are
+# created again after every migrate, see posts.search.create_sqlite_triggers().
+CREATE_SQLITE_TABLE = """
+CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+    title, body, content='posts_post', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+CREATE_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update AFTER UPDATE OF title, body ON posts_post
+    BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO posts_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+DROP_SQLITE = [
+    "DROP TRIGGER IF EXISTS posts_post_fts_insert",
+    "DROP TRIGGER IF EXISTS posts_post_fts_delete",
+    "DROP TRIGGER IF EXISTS posts_post_fts_update",
+    "DROP TABLE IF EXISTS posts_post_fts",
+]
+
+SEARCH_INDEX_NAME = "post_search_idx"
+
+
+def search_index(apps):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = SearchVector("title", weight="A", config="english") + SearchVector(
+        "body", weight="B", config="english"
+    )
+    return apps.get_model("posts", "Post"), GinIndex(vector, name=SEARCH_INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(CREATE_SQLITE_TABLE)
+        for sql in CREATE_SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+        schema_editor.execute("INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')")
+    elif vendor == "postgresql":
+        schema_editor.add_index(*search_index(apps))
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for sql in DROP_SQLITE:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        schema_editor.remove_index(*search_index(apps))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_tag_post_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,188 @@
+# src/posts/mixins.py
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from blogapi.routers import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    start_replica_reads,
+    stop_replica_reads,
+)
+
+from .cache import get_post_detail
+from .renderers import FastJSONRenderer
+from .serializers import get_requested_fields
+
+
+class ConditionalGetMixin:
+    """Answer ``If-None-Match``/``If-Modified-Since`` before serializing.
+
+    The validators are derived from ``last_modified_field``. A detail view
+    sends the object's own timestamp as ``Last-Modified`` and in its ETag. A
+    list view sends only an ETag, made from the ids and timestamps of the
+    rows on the requested page and its links: the page is located with the
+    same keyset query as the list, reading just those columns, so the cost
+    does not grow with the table. A deleted row changes the ETag of its page,
+    which a ``Last-Modified`` taken from the remaining rows could not show.
+
+    The validators are read with a single small query, and a matching request
+    is answered with 304 Not Modified without loading or serializing any rows.
+    """
+
+    last_modified_field = "updated_at"
+    # Validator of the retrieved object, for mixins serializing it.
+    last_modified = None
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = (
+            self._get_validator_queryset()
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(self.last_modified_field, flat=True)
+            .first()
+        )
+        self.last_modified = last_modified
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        return self._conditional_response(
+            request, last_modified, [last_modified], super().retrieve, *args, **kwargs
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            request, None, self._get_page_validators(request), super().list, *args, **kwargs
+        )
+
+    def _get_page_validators(self, request):
+        queryset = self._get_validator_queryset()
+        if self.pagination_class is None:
+            return list(queryset.values_list("pk", self.last_modified_field))
+        # A paginator of its own, to leave the one of the list untouched.
+        paginator = self.pagination_class()
+        ordering = [field.lstrip("-") for field in paginator.get_ordering(request, queryset, self)]
+        rows = paginator.paginate_queryset(
+            queryset.values("pk", self.last_modified_field, *ordering), request, view=self
+        )
+        # Whether there is a next or previous page shows in the links.
+        return [
+            *((row["pk"], row[self.last_modified_field]) for row in rows),
+            paginator.get_next_link(),
+            paginator.get_previous_link(),
+        ]
+
+    def _get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+
+    def _conditional_response(self, request, last_modified, validators, view, *args, **kwargs):
+        # The query string selects the representation (page, page size, ...)
+        # so it is part of the entity tag.
+        source = ":".join([request.get_full_path(), *(str(v) for v in validators)])
+        etag = quote_etag(hashlib.md5(source.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class CachedPostDetailMixin:
+    """Serve post details from the cache, see ``posts.cache.get_post_detail``.
+
+    Comes after ``ConditionalGetMixin``, whose validator query provides the
+    post's ``updated_at``, so a cache hit costs that single query. Sparse
+    fieldsets are not cached.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.last_modified is None or get_requested_fields(request) is not None:
+            return super().retrieve(request, *args, **kwargs)
+
+        def serialize():
+            return super(CachedPostDetailMixin, self).retrieve(request, *args, **kwargs).data
+
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return Response(get_post_detail(pk, self.last_modified, serialize))
+
+
+class FastListMixin:
+    """Opt-in list path which bypasses serializers (``POSTS_FAST_LISTS``).
+
+    Rows are read with ``.values(*fast_list_values)``, turned into their API
+    representation by the ``fast_list_row`` static method and rendered by ``FastJSONRenderer``.
+    The output is byte-identical to the serializer path, which is still used
+    for sparse fieldsets and whenever the setting is off.
+    """
+
+    fast_list_values = ()
+    fast_list_row = None
+
+    def use_fast_list(self):
+        return (
+            settings.POSTS_FAST_LISTS
+            and self.action == "list"
+            and "fields" not in self.request.query_params
+        )
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.use_fast_list():
+            return renderers
+        return [FastJSONRenderer() if type(r) is JSONRenderer else r for r in renderers]
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        queryset = queryset.values(*self.fast_list_values)
+        page = self.paginate_queryset(queryset)
+        rows = [self.fast_list_row(values) for values in (queryset if page is None else page)]
+        if page is None:
+            return Response(rows)
+        return self.get_paginated_response(rows)
+
+
+class ReplicaReadsMixin:
+    """Serve reads from the database replicas, see ``blogapi.routers``.
+
+    Safe requests read from the replicas, unless the client wrote with a
+    successful request shortly before: it is then pinned to the primary so
+    it reads its own writes. Clients are identified by user, or by IP
+    address when anonymous, like in ``WriteRateThrottle``.
+
+    Streamed responses are consumed after the view returns, so they read
+    from the primary.
+    """
+
+    _replica_reads_token = None
+
+    def get_client_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{BaseThrottle().get_ident(request)}"
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned_to_primary(
+            self.get_client_ident(request)
+        ):
+            self._replica_reads_token = start_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_reads_token is not None:
+            stop_replica_reads(self._replica_reads_token)
+            self._replica_reads_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(self.get_client_ident(request))
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,21 +1,123 @@
+from contextvars import ContextVar
+
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, Greatest, Substr
+from django.utils import timezone
 from django_fsm import FSMField, transition
 
+from .cache import bump_feed_version, delete_post_details
+
 
 def truncate_with_elipsis(s: str, max_length: int, elipsis: str = "...") -> str:
     if not isinstance(s, str):
         s = str(s)
-    truncated = (s[:max_length] + "..") if len(s) > max_length else s
+    truncated = (s[:max_length] + elipsis) if len(s) > max_length else s
     return truncated
 
 
+# Number of body characters shown in post lists.
+EXCERPT_LENGTH = 100
+
+
 class PostState(models.TextChoices):
     DRAFT = "draft"
     PUBLISHED = "published"
     ARCHIVED = "archived"
 
 
+class TransitionResult(models.TextChoices):
+    DONE = "done"
+    NOT_FOUND = "not_found"
+    NOT_ALLOWED = "not_allowed"
+    FORBIDDEN = "forbidden"
+
+
+class PostQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join authors and prefetch tags to serialize posts in constant queries."""
+        return self.select_related("author").prefetch_related(
+            models.Prefetch("tags", queryset=Tag.objects.only("id", "name"))
+        )
+
+    def summarized(self):
+        """Skip the body column, reading only the head needed for an excerpt.
+
+        The head is one character longer than ``EXCERPT_LENGTH`` so that
+        truncation can still be detected.
+        """
+        return self.defer("body").annotate(body_head=Substr("body", 1, EXCERPT_LENGTH + 1))
+
+    def touch(self):
+        """Mark posts as modified without going through ``save()``.
+
+        Used when something embedded in the post representation, such as its
+        tags, changes so that ``updated_at`` based validators notice.
+        """
+        return self.update(updated_at=timezone.now())
+
+    def refresh_comment_stats(self):
+        """Recompute ``comment_count`` and ``last_commented_at`` from comments."""
+        comments = Comment.objects.filter(post=models.OuterRef("pk")).order_by()
+        return self.update(
+            comment_count=Coalesce(
+                models.Subquery(
+                    comments.values("post").annotate(count=models.Count("pk")).values("count")
+                ),
+                0,
+            ),
+            last_commented_at=models.Subquery(
+                comments.order_by("-created_at").values("created_at")[:1]
+            ),
+        )
+
+    def bulk_transition(self, name: str, ids, user) -> dict[int, TransitionResult]:
+        """Apply the ``name`` state transition to many posts at once.
+
+        Source states, conditions and permissions are checked per post, the
+        way ``has_transition_perm`` does, against rows loaded with a single
+        query. Permitted posts then change state with one conditional
+        ``UPDATE ... WHERE state IN (allowed sources)`` per target state, so
+        posts which moved to another state in the meantime are left alone.
+        Transition signals are not sent, so the feed and post details are
+        invalidated here.
+        """
+        meta = getattr(self.model, name)._django_fsm
+        results = {pk: TransitionResult.NOT_FOUND for pk in ids}
+        permitted_by_target = {}
+        posts = self.select_related(None).prefetch_related(None).filter(pk__in=results)
+        for post in posts.only("id", "state", "author_id"):
+            if not meta.has_transition(post.state) or not meta.conditions_met(post, post.state):
+                results[post.pk] = TransitionResult.NOT_ALLOWED
+            elif not meta.has_transition_perm(post, post.state, user):
+                results[post.pk] = TransitionResult.FORBIDDEN
+            else:
+                permitted_by_target.setdefault(meta.next_state(post.state), []).append(post.pk)
+        now = timezone.now()
+        for target, pks in permitted_by_target.items():
+            sources = [
+                state
+                for state in PostState.values
+                if meta.has_transition(state) and meta.next_state(state) == target
+            ]
+            updated = posts.filter(pk__in=pks, state__in=sources).update(
+                state=target, updated_at=now
+            )
+            done = set(pks)
+            if updated != len(pks):
+                done = set(
+                    posts.filter(pk__in=pks, state=target, updated_at=now).values_list(
+                        "pk", flat=True
+                    )
+                )
+            for pk in pks:
+                results[pk] = TransitionResult.DONE if pk in done else TransitionResult.NOT_ALLOWED
+        if permitted_by_target:
+            bump_feed_version()
+            delete_post_details(pk for pks in permitted_by_target.values() for pk in pks)
+        return results
+
+
 class Post(models.Model):
     title = models.CharField(max_length=50)
     body = models.TextField()
@@ -24,15 +126,27 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     state = FSMField(default=PostState.DRAFT, choices=PostState.choices)
+    # Maintained from Comment signals, see posts.signals.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_commented_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "created_at"], name="post_state_created_idx"),
+            models.Index(fields=["author", "created_at"], name="post_author_created_idx"),
+            models.Index(fields=["created_at", "id"], name="post_created_id_idx"),
+        ]
 
     def can_publish(self, user):
-        return self.author == user
+        return self.author_id == user.pk
 
     def can_archive(self, user):
-        return self.author == user
+        return self.author_id == user.pk
 
     def can_draft(self, user):
-        return self.author == user
+        return self.author_id == user.pk
 
     @transition(
         field=state,
@@ -64,21 +178,135 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created_at"], name="comment_post_created_idx"),
+            models.Index(fields=["created_at", "id"], name="comment_created_id_idx"),
+        ]
+
     def __str__(self):
         label = truncate_with_elipsis(self.body, 50)
         return f"{self.author.username}: {label}"
 
 
+class TagQuerySet(models.QuerySet):
+    def refresh_post_counts(self):
+        """Recompute ``post_count`` from the tags' post links.
+
+        Counts every link of the tags, writes shift the counts instead.
+        """
+        links = PostTag.objects.filter(tag=models.OuterRef("pk")).order_by()
+        return self.update(
+            post_count=Coalesce(
+                models.Subquery(
+                    links.values("tag").annotate(count=models.Count("pk")).values("count")
+                ),
+                0,
+            )
+        )
+
+    def shift_post_counts(self, delta: int):
+        """Add ``delta`` to ``post_count``, without recounting the links.
+
+        Counts do not go below zero, links written with ``bulk_create()``
+        were never counted.
+        """
+        return self.update(post_count=Greatest(models.F("post_count") + delta, 0))
+
+    def popular(self):
+        """Used tags, most used first, served from ``tag_post_count_idx``."""
+        return self.filter(post_count__gt=0).order_by("-post_count", "name")
+
+
+class TagManager(models.Manager.from_queryset(TagQuerySet)):
+    def resolve(self, names) -> dict[str, int]:
+        """Map tag names to ids, creating the tags which do not exist yet.
+
+        Costs one query for the existing tags and, only if some are missing,
+        one batched insert plus one query for the ids of the new tags.
+        Concurrently created tags are picked up thanks to ``ignore_conflicts``.
+        """
+        names = set(names)
+        ids = dict(self.filter(name__in=names).values_list("name", "id"))
+        missing = names - ids.keys()
+        if missing:
+            self.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            ids.update(self.filter(name__in=missing).values_list("name", "id"))
+        return ids
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=30, unique=True)
+    # Maintained wherever post links change, see posts.signals.
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TagManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-post_count", "name"], name="tag_post_count_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# Set while PostTagManager.replace() deletes links: it updates the posts, tag
+# counts and caches for the whole batch, so the per-row PostTag receivers in
+# posts.signals skip those links.
+replacing_post_tags = ContextVar("replacing_post_tags", default=False)
+
+
+class PostTagManager(models.Manager):
+    def replace(self, tag_ids_by_post: dict[int, list[int]]) -> None:
+        """Link every post to exactly the given tags using batched writes.
+
+        Existing links of all posts are read with one query and diffed
+        against the requested ones, so only links which actually change are
+        deleted or inserted. Bulk writes bypass model signals, hence the
+        affected posts are touched, tag counts refreshed and the feed and
+        post details invalidated here.
+        """
+        if not tag_ids_by_post:
+            return
+        wanted = {
+            (post_id, tag_id)
+            for post_id, tag_ids in tag_ids_by_post.items()
+            for tag_id in tag_ids
+        }
+        existing = {
+            (post_id, tag_id): pk
+            for pk, post_id, tag_id in self.filter(post_id__in=tag_ids_by_post).values_list(
+                "pk", "post_id", "tag_id"
+            )
+        }
+        stale = {link: pk for link, pk in existing.items() if link not in wanted}
+        missing = wanted - existing.keys()
+        if stale:
+            token = replacing_post_tags.set(True)
+            try:
+                self.filter(pk__in=stale.values()).delete()
+            finally:
+                replacing_post_tags.reset(token)
+        if missing:
+            self.bulk_create(
+                [self.model(post_id=post_id, tag_id=tag_id) for post_id, tag_id in missing],
+                ignore_conflicts=True,
+            )
+        changed = stale.keys() | missing
+        if changed:
+            post_ids = {post_id for post_id, _ in changed}
+            Post.objects.filter(pk__in=post_ids).touch()
+            Tag.objects.filter(pk__in={tag_id for _, tag_id in changed}).refresh_post_counts()
+            bump_feed_version()
+            delete_post_details(post_ids)
+
+
 class PostTag(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
 
+    objects = PostTagManager()
+
     class Meta:
         unique_together = ("post", "tag")
@@ -0,0 +1,246 @@
+# src/posts/ndjson.py
+"""Newline-delimited JSON export and import of posts with tags and comments.
+
+Every line is one post::
+
+    {"id": 1, "title": "...", "body": "...", "author": 1, "state": "draft",
+     "created_at": "...", "updated_at": "...", "tags": ["django"],
+     "comments": [{"id": 1, "body": "...", "author": 2, "created_at": "...",
+                   "updated_at": "..."}]}
+"""
+
+import json
+from collections.abc import Iterator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_feed_version
+from .models import Comment, Post, PostState, PostTag, Tag
+from .rows import format_datetime
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+CHUNK_SIZE = 500
+
+
+def dumps(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def comment_record(comment: Comment) -> dict:
+    return {
+        "id": comment.id,
+        "body": comment.body,
+        "author": comment.author_id,
+        "created_at": format_datetime(comment.created_at),
+        "updated_at": format_datetime(comment.updated_at),
+    }
+
+
+def post_record(post) -> dict:
+    return {
+        "id": post.id,
+        "title": post.title,
+        "body": post.body,
+        "author": post.author_id,
+        "state": post.state,
+        "created_at": format_datetime(post.created_at),
+        "updated_at": format_datetime(post.updated_at),
+        "tags": [tag.name for tag in post.tags.all()],
+        "comments": [comment_record(comment) for comment in post.comments.all()],
+    }
+
+
+def export_posts(queryset, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the posts of ``queryset`` as NDJSON lines, in primary key order.
+
+    Posts are fetched ``chunk_size`` at a time together with the tags and
+    comments of that chunk, so memory use does not grow with the table.
+    """
+    queryset = (
+        queryset.select_related(None)
+        .prefetch_related(None)
+        .order_by("pk")
+        .prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "name").order_by("name")),
+            Prefetch("comments", queryset=Comment.objects.order_by("created_at", "id")),
+        )
+    )
+    for post in queryset.iterator(chunk_size=chunk_size):
+        yield dumps(post_record(post)) + b"\n"
+
+
+BATCH_SIZE = 1000
+
+
+class NDJSONImportError(ValueError):
+    """A line of an NDJSON import cannot be imported."""
+
+
+def parse_records(lines) -> Iterator[tuple[int, dict]]:
+    """Yield ``(line number, record)`` for every non-blank line."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise NDJSONImportError(f"Line {number}: invalid JSON ({e}).") from e
+        if not isinstance(record, dict):
+            raise NDJSONImportError(f"Line {number}: expected a JSON object.")
+        yield number, record
+
+
+def import_posts(lines, batch_size: int = BATCH_SIZE, progress=None) -> int:
+    """Insert the posts, tags and comments of NDJSON ``lines``.
+
+    Lines use the format written by ``export_posts``; ids are not imported,
+    every post and comment is created anew. Records are processed
+    ``batch_size`` posts at a time, each batch in its own transaction using
+    bulk inserts, so a failing line only rolls back its own batch. ``progress``
+    is called with the number of posts imported so far after every batch.
+    Returns the number of imported posts.
+    """
+    imported = 0
+    batch = []
+    for item in parse_records(lines):
+        batch.append(item)
+        if len(batch) == batch_size:
+            imported += _import_batch(batch)
+            batch = []
+            if progress:
+                progress(imported)
+    if batch:
+        imported += _import_batch(batch)
+        if progress:
+            progress(imported)
+    if imported:
+        bump_feed_version()
+    return imported
+
+
+def _text(record, key, number, max_length=None, default=None):
+    value = record.get(key, default)
+    if not isinstance(value, str) or (max_length and len(value) > max_length):
+        limit = f" of at most {max_length} characters" if max_length else ""
+        raise NDJSONImportError(f"Line {number}: {key!r} must be a string{limit}.")
+    return value
+
+
+def _datetime(record, key, number, default):
+    value = record.get(key)
+    if value is None:
+        return default
+    try:
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+    except ValueError:
+        # Well formed but impossible, e.g. February 30th.
+        parsed = None
+    if parsed is None:
+        raise NDJSONImportError(f"Line {number}: {key!r} must be an ISO 8601 date and time.")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def _author(record, number, known_author_ids):
+    author_id = record.get("author")
+    if author_id not in known_author_ids:
+        raise NDJSONImportError(f"Line {number}: unknown author {author_id!r}.")
+    return author_id
+
+
+@transaction.atomic
+def _import_batch(batch) -> int:
+    now = timezone.now()
+    records = [record for _, record in batch]
+    author_ids = {r.get("author") for r in records} | {
+        c.get("author") for r in records for c in r.get("comments") or [] if isinstance(c, dict)
+    }
+    known_author_ids = set(
+        get_user_model()
+        .objects.filter(pk__in=[pk for pk in author_ids if isinstance(pk, int)])
+        .values_list("pk", flat=True)
+    )
+
+    posts, tag_names, comments = [], [], []
+    for number, record in batch:
+        names = record.get("tags") or []
+        if not isinstance(names, list) or not all(
+            isinstance(name, str) and 0 < len(name) <= 30 for name in names
+        ):
+            raise NDJSONImportError(f"Line {number}: 'tags' must be a list of tag names.")
+        state = record.get("state", PostState.DRAFT)
+        if state not in PostState.values:
+            raise NDJSONImportError(f"Line {number}: unknown state {state!r}.")
+        post_comments = record.get("comments") or []
+        if not isinstance(post_comments, list) or not all(
+            isinstance(c, dict) for c in post_comments
+        ):
+            raise NDJSONImportError(f"Line {number}: 'comments' must be a list of objects.")
+        commented = [
+            Comment(
+                body=_text(c, "body", number, default=""),
+                author_id=_author(c, number, known_author_ids),
+                created_at=_datetime(c, "created_at", number, now),
+                updated_at=_datetime(c, "updated_at", number, now),
+            )
+            for c in post_comments
+        ]
+        created_at = _datetime(record, "created_at", number, now)
+        posts.append(
+            Post(
+                title=_text(record, "title", number, max_length=50, default=""),
+                body=_text(record, "body", number, default=""),
+                author_id=_author(record, number, known_author_ids),
+                state=state,
+                created_at=created_at,
+                updated_at=_datetime(record, "updated_at", number, created_at),
+                comment_count=len(commented),
+                last_commented_at=max((c.created_at for c in commented), default=None),
+            )
+        )
+        tag_names.append(set(names))
+        comments.append(commented)
+
+    _bulk_create_with_timestamps(Post, posts)
+
+    tag_ids = Tag.objects.resolve(name for names in tag_names for name in names)
+    PostTag.objects.bulk_create(
+        [
+            PostTag(post_id=post.pk, tag_id=tag_ids[name])
+            for post, names in zip(posts, tag_names)
+            for name in names
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Tag.objects.filter(pk__in=tag_ids.values()).refresh_post_counts()
+
+    all_comments = []
+    for post, post_comments in zip(posts, comments):
+        for comment in post_comments:
+            comment.post_id = post.pk
+            all_comments.append(comment)
+    _bulk_create_with_timestamps(Comment, all_comments)
+    return len(posts)
+
+
+def _bulk_create_with_timestamps(model, objs):
+    """Insert ``objs`` keeping their ``created_at`` and ``updated_at``.
+
+    ``bulk_create`` lets ``auto_now_add`` and ``auto_now`` overwrite both
+    fields, so they are written back afterwards with ``bulk_update``, one
+    ``UPDATE ... CASE`` per batch of rows.
+    """
+    timestamps = [(obj.created_at, obj.updated_at) for obj in objs]
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    for obj, (created_at, updated_at) in zip(objs, timestamps):
+        obj.created_at, obj.updated_at = created_at, updated_at
+    model.objects.bulk_update(objs, ["created_at", "updated_at"], batch_size=BATCH_SIZE)
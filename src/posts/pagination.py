@@ -0,0 +1,27 @@
+# src/posts/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination with a client-selectable page size.
+
+    Pages are located by seeking on the ordering columns rather than with an
+    OFFSET, so fetching a deep page costs the same as fetching the first one.
+    The default page size comes from ``REST_FRAMEWORK["PAGE_SIZE"]``.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class PostPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ("created_at", "id")
+
+
+class TagPagination(KeysetPagination):
+    ordering = ("name",)
@@ -0,0 +1,113 @@
+# src/posts/pubsub.py
+"""Publish/subscribe of messages to async subscribers, e.g. new comments.
+
+The broker is selected by the ``POSTS_PUBSUB_BACKEND`` setting. The default
+``LocalBroker`` only reaches subscribers of the current process; a broker
+backed by Redis or similar implements the same ``publish()``/``subscribe()``
+interface to fan out across processes.
+
+Subscribers buffer at most ``POSTS_PUBSUB_QUEUE_SIZE`` messages. When a slow
+subscriber's buffer is full, its pending messages are dropped and it receives
+``OVERFLOW`` instead, so memory stays bounded and the subscriber knows it has
+to catch up from the database.
+"""
+
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Delivered instead of the messages dropped from a full subscriber queue.
+OVERFLOW = object()
+
+
+def comments_channel(post_id: int) -> str:
+    return f"posts:{post_id}:comments"
+
+
+class Subscription:
+    """Messages of one channel for one subscriber, read with ``await get()``."""
+
+    def __init__(self, broker, channel: str, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def put(self, message):
+        """Queue ``message``; only called from the subscriber's event loop."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class Broker:
+    def publish(self, channel: str, message) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """In-process broker, safe to publish to from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions: dict[str, set[Subscription]] = {}
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, settings.POSTS_PUBSUB_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def count(self, channel) -> int:
+        with self.lock:
+            return len(self.subscriptions.get(channel, ()))
+
+
+_brokers = {}
+
+
+def get_broker() -> Broker:
+    path = settings.POSTS_PUBSUB_BACKEND
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
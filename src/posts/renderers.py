@@ -0,0 +1,47 @@
+# src/posts/renderers.py
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer producing the same bytes as ``JSONRenderer``, faster.
+
+    Compact, non-indented output is encoded with orjson when it is
+    installed. Any other configuration, or a missing orjson, falls back to
+    the standard renderer. Types orjson does not know are converted by DRF's
+    encoder, so the output stays byte-identical for the data our views emit.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=encoders.JSONEncoder().default)
+        # Same escaping of \u2028 and \u2029 as JSONRenderer.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Newline-delimited JSON.
+
+    Streaming views write their own lines, this renderer only lets clients
+    ask for the media type and renders error responses as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        ret = super().render(data, accepted_media_type, renderer_context)
+        return ret + b"\n" if ret else ret
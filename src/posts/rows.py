@@ -0,0 +1,93 @@
+# src/posts/rows.py
+"""Build API representations straight from ``QuerySet.values()`` rows.
+
+Each ``*_VALUES`` tuple lists the columns to read and the matching ``*_row``
+function returns the same dictionary, key order included, as the serializer
+it mirrors. This skips the per-field serializer machinery on hot read paths.
+"""
+
+from rest_framework import serializers
+
+from .models import EXCERPT_LENGTH, truncate_with_elipsis
+
+_datetime_field = serializers.DateTimeField()
+
+
+def format_datetime(value):
+    return _datetime_field.to_representation(value)
+
+
+# PostSummarySerializer; expects a queryset from ``PostQuerySet.summarized()``.
+POST_SUMMARY_VALUES = (
+    "id",
+    "title",
+    "author_id",
+    "state",
+    "created_at",
+    "comment_count",
+    "body_head",
+)
+
+
+def post_summary_row(values: dict) -> dict:
+    return {
+        "id": values["id"],
+        "title": values["title"],
+        "author": values["author_id"],
+        "state": values["state"],
+        "created_at": format_datetime(values["created_at"]),
+        "comment_count": values["comment_count"],
+        "excerpt": truncate_with_elipsis(values["body_head"], EXCERPT_LENGTH),
+    }
+
+
+# PostSerializer, with the tags of the post as ``tag_row`` dictionaries.
+POST_VALUES = (
+    "id",
+    "title",
+    "body",
+    "author_id",
+    "state",
+    "created_at",
+    "updated_at",
+    "comment_count",
+    "last_commented_at",
+)
+
+
+def post_row(values: dict, tags: list[dict]) -> dict:
+    return {
+        "id": values["id"],
+        "title": values["title"],
+        "body": values["body"],
+        "author": values["author_id"],
+        "state": values["state"],
+        "created_at": format_datetime(values["created_at"]),
+        "updated_at": format_datetime(values["updated_at"]),
+        "comment_count": values["comment_count"],
+        "last_commented_at": format_datetime(values["last_commented_at"]),
+        "tags": tags,
+    }
+
+
+# CommentSerializer
+COMMENT_VALUES = ("id", "post_id", "body", "author_id", "created_at", "updated_at")
+
+
+def comment_row(values: dict) -> dict:
+    return {
+        "id": values["id"],
+        "post": values["post_id"],
+        "body": values["body"],
+        "author": values["author_id"],
+        "created_at": format_datetime(values["created_at"]),
+        "updated_at": format_datetime(values["updated_at"]),
+    }
+
+
+# TagSerializer
+TAG_VALUES = ("id", "name")
+
+
+def tag_row(values: dict) -> dict:
+    return {"id": values["id"], "name": values["name"]}
@@ -0,0 +1,133 @@
+# src/posts/search.py
+"""Ranked full-text search over post titles and bodies.
+
+The index depends on the database backend, see migration
+``0006_post_search``:
+
+SQLite
+    The ``posts_post_fts`` FTS5 table, kept in sync with ``posts_post`` by
+    triggers, so bulk writes and ``update()`` are indexed as well. SQLite
+    drops the triggers when a migration rebuilds ``posts_post``, so they are
+    created again after every ``migrate`` by ``create_sqlite_triggers()``.
+PostgreSQL
+    A GIN index over the weighted ``SearchVector`` of ``SEARCH_VECTOR``.
+
+Other backends fall back to unranked ``icontains`` matching.
+"""
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Title matches weigh more than body matches.
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+SEARCH_CONFIG = "english"
+
+SQLITE_FTS_TABLE = "posts_post_fts"
+
+# Must stay identical to the triggers of migration ``0006_post_search``.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_update AFTER UPDATE OF title, body ON posts_post
+    BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO posts_post_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+# The rowids of the posts matching an FTS5 query.
+SQLITE_MATCH = f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s"
+# bm25() of one matching post; lower is better.
+SQLITE_BM25 = (
+    f"SELECT bm25({SQLITE_FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) FROM {SQLITE_FTS_TABLE}"
+    f" WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = posts_post.id"
+)
+
+
+def create_sqlite_triggers(using, **kwargs):
+    """Create the triggers syncing the FTS5 table, if missing.
+
+    Connected to ``post_migrate``. Does nothing before migration
+    ``0006_post_search`` has created the table.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    if SQLITE_FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def search_vector():
+    """The expression indexed by ``post_search_idx`` on PostgreSQL.
+
+    Must stay identical to the one in migration ``0006_post_search`` for the
+    index to be used.
+    """
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("title", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "body", weight="B", config=SEARCH_CONFIG
+    )
+
+
+def fts5_query(q: str) -> str:
+    """Quote every word of ``q`` so FTS5 matches posts containing all of them."""
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in q.split())
+
+
+def search_posts(queryset, q: str):
+    """Filter ``queryset`` to posts matching ``q``, annotated and ordered by ``rank``.
+
+    A higher ``rank`` means a better match.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        # FTS5 tables have no model; the MATCH subquery selects the posts by
+        # primary key, and bm25() is read for each of them only.
+        query = fts5_query(q)
+        return (
+            queryset.filter(id__in=RawSQL(SQLITE_MATCH, [query]))
+            .annotate(rank=-RawSQL(SQLITE_BM25, [query], output_field=FloatField()))
+            .order_by("-rank", "-id")
+        )
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(q, config=SEARCH_CONFIG)
+        vector = search_vector()
+        return (
+            queryset.alias(search=vector)
+            .filter(search=query)
+            .annotate(rank=SearchRank(vector, query))
+            .order_by("-rank", "-id")
+        )
+    return unranked_search_posts(queryset, q)
+
+
+def unranked_search_posts(queryset, q: str):
+    """Match every word of ``q`` with ``icontains``, scanning all posts."""
+    condition = Q()
+    for word in q.split():
+        condition &= Q(title__icontains=word) | Q(body__icontains=word)
+    return (
+        queryset.filter(condition)
+        .annotate(rank=Value(0.0, output_field=FloatField()))
+        .order_by("-created_at", "-id")
+    )
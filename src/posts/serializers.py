@@ -1,22 +1,321 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Post, Comment, Tag
+from rest_framework.permissions import SAFE_METHODS
+from .cache import bump_feed_version
+from .models import EXCERPT_LENGTH, Post, Comment, PostTag, Tag, truncate_with_elipsis
 
 
-class TagSerializer(serializers.ModelSerializer):
+def to_pks(values) -> set[int]:
+    """Return the values which look like integer primary keys."""
+    pks = set()
+    for value in values:
+        try:
+            pks.add(int(value))
+        except (TypeError, ValueError):
+            pass
+    return pks
+
+
+def get_requested_fields(request) -> list[str] | None:
+    """Return the field names of a read request's ``?fields=`` parameter."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsMixin:
+    """Serialize only the fields listed in the ``?fields=`` query parameter.
+
+    Applies to the top level serializer of read requests only; writes always
+    accept every field and nested serializers always render in full.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = get_requested_fields(self.context.get("request"))
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if requested is None or parent is not None:
+            return fields
+        readable = {name for name, field in fields.items() if not field.write_only}
+        unknown = set(requested) - readable
+        if unknown:
+            raise serializers.ValidationError({"fields": [f"Unknown fields: {sorted(unknown)}."]})
+        return {name: field for name, field in fields.items() if name in requested}
+
+
+def pop_tag_ids(items: list[dict]) -> list[list[int] | None]:
+    """Pop the ``tag_ids`` or ``tag_names`` of validated post items.
+
+    Returns the tag ids of every item, ``None`` where tags were not sent.
+    Tag names of all items are resolved together, creating missing tags, so
+    the cost does not depend on the number of items or tags.
+    """
+    names = [item.pop("tag_names", None) for item in items]
+    tag_ids = [item.pop("tag_ids", None) for item in items]
+    if any(n is not None for n in names):
+        ids_by_name = Tag.objects.resolve(name for n in names if n for name in n)
+        tag_ids = [
+            [ids_by_name[name] for name in n] if n is not None else ids
+            for n, ids in zip(names, tag_ids)
+        ]
+    return tag_ids
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field resolved from objects preloaded by a bulk serializer.
+
+    When the root serializer context holds ``preloaded[field_name]``, a
+    mapping of primary keys to objects, values are looked up there instead of
+    issuing one ``get()`` query per item.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return preloaded[pk]
+        except (KeyError, TypeError):
+            self.fail("does_not_exist", pk_value=data)
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["id", "name"]
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PopularTagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ["id", "name", "post_count"]
+        read_only_fields = fields
+
+
+class PopularTagsQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class PostBulkSerializer(serializers.ListSerializer):
+    """Create or update many posts with batched queries in one transaction.
+
+    Authors and tags referenced by the payload are loaded with one query
+    each before the items are validated. Posts are then written with
+    ``bulk_create``/``bulk_update`` and their tag links with
+    ``PostTag.objects.replace()``.
+    """
+
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._preload(data)
+        return super().to_internal_value(data)
+
+    def _preload(self, data):
+        items = [item for item in data if isinstance(item, dict)]
+        author_field = self.child.fields["author"]
+        tag_ids = to_pks(tag_id for item in items for tag_id in item.get("tag_ids") or [])
+        self._context["preloaded"] = {
+            "author": author_field.get_queryset().in_bulk(to_pks(i.get("author") for i in items)),
+            "tag_ids": set(Tag.objects.filter(pk__in=tag_ids).values_list("pk", flat=True)),
+        }
+
+    @property
+    def instances_by_pk(self) -> dict[int, Post]:
+        if not hasattr(self, "_instances_by_pk"):
+            self._instances_by_pk = {post.pk: post for post in self.instance}
+        return self._instances_by_pk
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        pk = next(iter(to_pks([data.get("id")])), None) if isinstance(data, dict) else None
+        if pk not in self.instances_by_pk:
+            raise serializers.ValidationError({"id": ["Post to update does not exist."]})
+        self.child.instance = self.instances_by_pk[pk]
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        validated["id"] = pk
+        return validated
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            tag_ids = pop_tag_ids(validated_data)
+            posts = Post.objects.bulk_create(
+                [Post(**item) for item in validated_data], batch_size=self.batch_size
+            )
+            PostTag.objects.replace(
+                {post.pk: ids for post, ids in zip(posts, tag_ids) if ids is not None}
+            )
+        bump_feed_version()
+        return self._refetch(posts)
+
+    def update(self, instance, validated_data):
+        now = timezone.now()
+        fields = {"updated_at"}
+        tag_ids_by_post = {}
+        posts = {}
+        with transaction.atomic():
+            for item, tag_ids in zip(validated_data, pop_tag_ids(validated_data)):
+                post = self.instances_by_pk[item.pop("id")]
+                if tag_ids is not None:
+                    tag_ids_by_post[post.pk] = tag_ids
+                for attr, value in item.items():
+                    setattr(post, attr, value)
+                    fields.add(attr)
+                post.updated_at = now
+                posts[post.pk] = post
+            Post.objects.bulk_update(posts.values(), sorted(fields), batch_size=self.batch_size)
+            PostTag.objects.replace(tag_ids_by_post)
+        bump_feed_version()
+        return self._refetch(posts.values())
+
+    def _refetch(self, posts):
+        """Reload written posts with authors and tags, keeping their order."""
+        posts = list(posts)
+        loaded = Post.objects.with_related().in_bulk([post.pk for post in posts])
+        return [loaded[post.pk] for post in posts]
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = PreloadedPrimaryKeyRelatedField(queryset=get_user_model().objects.all())
     tags = TagSerializer(many=True, read_only=True)
+    tag_ids = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
+    )
+    tag_names = serializers.ListField(
+        child=serializers.CharField(max_length=Tag._meta.get_field("name").max_length),
+        write_only=True,
+        required=False,
+    )
+
+    class Meta:
+        model = Post
+        fields = [
+            "id",
+            "title",
+            "body",
+            "author",
+            "state",
+            "created_at",
+            "updated_at",
+            "comment_count",
+            "last_commented_at",
+            "tags",
+            "tag_ids",
+            "tag_names",
+        ]
+        read_only_fields = ["state"]
+        list_serializer_class = PostBulkSerializer
+
+    def validate_tag_ids(self, value):
+        tag_ids = set(value)
+        known = self.context.get("preloaded", {}).get("tag_ids")
+        if known is None:
+            known = set(Tag.objects.filter(pk__in=tag_ids).values_list("pk", flat=True))
+        missing = tag_ids - known
+        if missing:
+            raise serializers.ValidationError(f"Unknown tag ids: {sorted(missing)}.")
+        return sorted(tag_ids)
+
+    def validate_tag_names(self, value):
+        return sorted(set(value))
+
+    def validate(self, attrs):
+        if "tag_ids" in attrs and "tag_names" in attrs:
+            raise serializers.ValidationError("Send either tag_ids or tag_names, not both.")
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        (tag_ids,) = pop_tag_ids([validated_data])
+        post = super().create(validated_data)
+        self._replace_tags(post, tag_ids)
+        return post
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        (tag_ids,) = pop_tag_ids([validated_data])
+        post = super().update(instance, validated_data)
+        self._replace_tags(post, tag_ids)
+        return post
+
+    def _replace_tags(self, post, tag_ids):
+        if tag_ids is None:
+            return
+        PostTag.objects.replace({post.pk: tag_ids})
+        post.refresh_from_db(fields=["updated_at"])
+
+
+class PostSummarySerializer(serializers.ModelSerializer):
+    """Compact post representation for lists, with an excerpt instead of the body.
+
+    Expects posts loaded with ``PostQuerySet.summarized()``.
+    """
+
+    excerpt = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = ["id", "title", "author", "state", "created_at", "comment_count", "excerpt"]
+        read_only_fields = fields
+
+    def get_excerpt(self, post):
+        return truncate_with_elipsis(post.body_head, EXCERPT_LENGTH)
+
+
+class PostSearchResultSerializer(PostSummarySerializer):
+    """Summary of a post found by search, with its relevance."""
+
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(PostSummarySerializer.Meta):
+        fields = PostSummarySerializer.Meta.fields + ["rank"]
+        read_only_fields = fields
+
+
+class PostSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_q(self, value):
+        if not value.split():
+            raise serializers.ValidationError("Expected at least one word.")
+        return value
+
+
+class PostStateSerializer(serializers.ModelSerializer):
+    """The fields a state transition changes."""
 
     class Meta:
         model = Post
-        fields = ["id", "title", "body", "author", "created_at", "updated_at", "tags"]
+        fields = ["id", "state", "updated_at"]
+        read_only_fields = fields
+
+
+class PostTransitionSerializer(serializers.Serializer):
+    TRANSITIONS = sorted(t.name for t in Post._meta.get_field("state").get_all_transitions(Post))
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=10_000
+    )
+    transition = serializers.ChoiceField(choices=TRANSITIONS)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ["id", "post", "body", "author", "created_at", "updated_at"]
@@ -0,0 +1,166 @@
+# src/posts/signals.py
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django_fsm.signals import post_transition
+
+from .cache import bump_feed_version, delete_post_details
+from .models import Comment, Post, PostTag, Tag, replacing_post_tags
+from .pubsub import comments_channel, get_broker
+from .rows import COMMENT_VALUES, comment_row
+
+# PostTag rows are written through ``post.tags`` (m2m_changed below), in
+# batches through ``PostTag.objects.replace()``, which touches posts, refreshes
+# tag counts and invalidates caches itself, or row by row (PostTag receivers
+# below). ``manage.py recompute_tag_counts`` repairs counts.
+
+
+def is_deleting(origin, model) -> bool:
+    """Whether a delete started from ``model`` instances or a queryset of them."""
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+@receiver(post_transition, sender=Post)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_feed(sender, **kwargs):
+    bump_feed_version()
+
+
+@receiver(post_transition, sender=Post)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_detail(sender, instance, **kwargs):
+    delete_post_details([instance.pk])
+
+
+@receiver(post_save, sender=PostTag)
+def count_saved_post_tag(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        Tag.objects.filter(pk=instance.tag_id).shift_post_counts(1)
+    else:
+        # The link may have moved to another tag, whose previous one is left
+        # to the repair command.
+        Tag.objects.filter(pk=instance.tag_id).refresh_post_counts()
+    Post.objects.filter(pk=instance.post_id).touch()
+    bump_feed_version()
+    delete_post_details([instance.post_id])
+
+
+@receiver(post_delete, sender=PostTag)
+def count_deleted_post_tag(sender, instance, origin=None, **kwargs):
+    if replacing_post_tags.get():
+        return
+    # Links deleted along with their tag or post need no recount of that
+    # side, the receivers of the deleted tag or post take care of the rest.
+    if not is_deleting(origin, Tag):
+        Tag.objects.filter(pk=instance.tag_id).shift_post_counts(-1)
+    if is_deleting(origin, PostTag):
+        Post.objects.filter(pk=instance.post_id).touch()
+        bump_feed_version()
+        delete_post_details([instance.post_id])
+
+
+@receiver(post_save, sender=Tag)
+def touch_posts_of_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        Post.objects.filter(tags=instance).touch()
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_posts_of_deleted_tag(sender, instance, **kwargs):
+    Post.objects.filter(tags=instance).touch()
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_posts_of_changed_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        Post.objects.filter(pk=instance.pk).touch()
+        delete_post_details([instance.pk])
+    elif reverse and action in ("post_add", "post_remove"):
+        Post.objects.filter(pk__in=pk_set).touch()
+        delete_post_details(pk_set)
+    elif reverse and action == "pre_clear":
+        Post.objects.filter(tags=instance).touch()
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_added_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # Links are added with a bulk insert which sends no PostTag signals; pk_set
+    # only holds the links actually added. Removed and cleared links are
+    # deleted row by row and counted by count_deleted_post_tag().
+    if action != "post_add":
+        return
+    if reverse:
+        Tag.objects.filter(pk=instance.pk).shift_post_counts(len(pk_set))
+    else:
+        Tag.objects.filter(pk__in=pk_set).shift_post_counts(1)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_commented_post(sender, instance, **kwargs):
+    # Comments can be moved to another post on update; keep the previous post
+    # so both posts' statistics can be corrected after saving.
+    if instance.pk is not None:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk).values_list("post_id", flat=True).first()
+        )
+
+
+# Comment statistics are part of the post representation, so maintaining them
+# also moves the post's updated_at.
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixtures bring the post's statistics along.
+        return
+    if created:
+        commented_at = Value(instance.created_at)
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F("comment_count") + 1,
+            last_commented_at=Greatest(Coalesce("last_commented_at", commented_at), commented_at),
+            updated_at=timezone.now(),
+        )
+        return
+    previous_post_id = getattr(instance, "_previous_post_id", None)
+    if previous_post_id is not None and previous_post_id != instance.post_id:
+        Post.objects.filter(pk__in=[previous_post_id, instance.post_id]).refresh_comment_stats()
+        Post.objects.filter(pk__in=[previous_post_id, instance.post_id]).touch()
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    if not created:
+        return
+    row = comment_row({name: getattr(instance, name) for name in COMMENT_VALUES})
+    # Subscribers may look the comment up, so only announce committed rows.
+    transaction.on_commit(
+        lambda: get_broker().publish(comments_channel(instance.post_id), row)
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+    if is_deleting(origin, Post):
+        # The post itself is being deleted, there is nothing left to count.
+        return
+    latest = Comment.objects.filter(post=OuterRef("pk")).order_by("-created_at")
+    Post.objects.filter(pk=instance.post_id).update(
+        # Comments written with bulk_create() were never counted.
+        comment_count=Greatest(F("comment_count") - 1, 0),
+        last_commented_at=Subquery(latest.values("created_at")[:1]),
+        updated_at=timezone.now(),
+    )
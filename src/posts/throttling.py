@@ -0,0 +1,133 @@
+# src/posts/throttling.py
+"""Rate throttles counting requests with atomic cache increments.
+
+DRF's ``SimpleRateThrottle`` stores the timestamps of a client's recent
+requests as one cache value which every request reads, extends and writes
+back, so concurrent requests lose each other's updates and the value grows
+with the rate. The throttles here count requests per fixed time window
+instead: the first request of a window ``add()``s its counter, the following
+ones ``incr()`` it, both atomic in the cache backends.
+
+Rates are read from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`` on every
+request, so they follow setting changes. A rate of ``None`` disables a scope.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """Fixed window throttle, subclasses define ``scope`` and ``get_cache_key()``."""
+
+    def __init__(self):
+        # The rate is resolved per request, see allow_request().
+        pass
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def allow_request(self, request, view):
+        key = self.get_window_key(request, view)
+        if key is None:
+            return True
+        if self.cache.add(key, 1, self.duration):
+            count = 1
+        else:
+            try:
+                count = self.cache.incr(key)
+            except ValueError:
+                # The counter expired between add() and incr().
+                self.cache.add(key, 1, self.duration)
+                count = 1
+        return count <= self.num_requests
+
+    async def aallow_request(self, request, view):
+        """``allow_request()`` for async views, using the async cache API."""
+        key = self.get_window_key(request, view)
+        if key is None:
+            return True
+        if await self.cache.aadd(key, 1, self.duration):
+            count = 1
+        else:
+            try:
+                count = await self.cache.aincr(key)
+            except ValueError:
+                await self.cache.aadd(key, 1, self.duration)
+                count = 1
+        return count <= self.num_requests
+
+    def get_window_key(self, request, view):
+        """Return the counter key of the current window, ``None`` if not throttled."""
+        self.num_requests, self.duration = self.parse_rate(self.get_rate())
+        if self.num_requests is None:
+            return None
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return None
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_ends_at = (window + 1) * self.duration
+        return f"{self.key}_{window}"
+
+    def wait(self):
+        return max(self.window_ends_at - self.timer(), 0)
+
+
+class UserBurstRateThrottle(CounterRateThrottle):
+    """Short term limit of authenticated users."""
+
+    scope = "user_burst"
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
+
+
+class UserSustainedRateThrottle(UserBurstRateThrottle):
+    """Long term limit of authenticated users."""
+
+    scope = "user_sustained"
+
+
+class AnonBurstRateThrottle(CounterRateThrottle):
+    """Short term limit of anonymous clients, by IP address."""
+
+    scope = "anon_burst"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class AnonSustainedRateThrottle(AnonBurstRateThrottle):
+    """Long term limit of anonymous clients, by IP address."""
+
+    scope = "anon_sustained"
+
+
+class WriteRateThrottle(CounterRateThrottle):
+    """Limit writes to views declaring a ``write_throttle_scope``.
+
+    Clients are identified by user, or by IP address when anonymous. Reads
+    and views without the attribute are not limited.
+    """
+
+    def get_window_key(self, request, view):
+        self.scope = getattr(view, "write_throttle_scope", None)
+        if self.scope is None or request.method in SAFE_METHODS:
+            return None
+        return super().get_window_key(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
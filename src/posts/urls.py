@@ -2,13 +2,42 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, TagViewSet
+from . import async_views
+from .views import (
+    CommentViewSet,
+    FeedViewSet,
+    PostCommentViewSet,
+    PostViewSet,
+    TagViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"posts", PostViewSet, basename="posts")
+router.register(r"posts/(?P<post_pk>\d+)/comments", PostCommentViewSet, basename="post-comments")
 router.register(r"comments", CommentViewSet, basename="comments")
 router.register(r"tags", TagViewSet, basename="tags")
+router.register(r"feed", FeedViewSet, basename="feed")
+
+async_urlpatterns = [
+    path("posts/", async_views.post_list, name="async-posts-list"),
+    path("posts/<int:pk>/", async_views.post_detail, name="async-posts-detail"),
+    path(
+        "posts/<int:post_pk>/comments/",
+        async_views.post_comment_list,
+        name="async-post-comments-list",
+    ),
+    path("comments/", async_views.comment_list, name="async-comments-list"),
+    path("comments/<int:pk>/", async_views.comment_detail, name="async-comments-detail"),
+    path("tags/", async_views.tag_list, name="async-tags-list"),
+    path("tags/<int:pk>/", async_views.tag_detail, name="async-tags-detail"),
+]
 
 urlpatterns = [
+    path(
+        "posts/<int:post_pk>/comments/stream/",
+        async_views.post_comment_stream,
+        name="post-comments-stream",
+    ),
     path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
 ]
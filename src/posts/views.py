@@ -1,20 +1,261 @@
 # src/posts/views.py
 
-from rest_framework import viewsets
-from .models import Post, Comment, Tag
-from .serializers import PostSerializer, CommentSerializer, TagSerializer
+from django.http import StreamingHttpResponse
+from django_fsm import can_proceed, has_transition_perm
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+from .cache import feed_cache_key, get_feed_page, set_feed_page
+from .filters import CommentFilterBackend, PostFilterBackend
+from .mixins import (
+    CachedPostDetailMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    ReplicaReadsMixin,
+)
+from .renderers import NDJSONRenderer
+from .models import Post, PostState, Comment, Tag
+from .ndjson import export_posts
+from .search import search_posts
+from .pagination import CommentPagination, PostPagination, TagPagination
+from .rows import (
+    COMMENT_VALUES,
+    POST_SUMMARY_VALUES,
+    TAG_VALUES,
+    comment_row,
+    post_summary_row,
+    tag_row,
+)
+from .serializers import (
+    CommentSerializer,
+    PostSearchQuerySerializer,
+    PostSearchResultSerializer,
+    PostSerializer,
+    PostStateSerializer,
+    PostSummarySerializer,
+    PostTransitionSerializer,
+    PopularTagSerializer,
+    PopularTagsQuerySerializer,
+    TagSerializer,
+    get_requested_fields,
+    to_pks,
+)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    CachedPostDetailMixin,
+    FastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    pagination_class = PostPagination
+    filter_backends = [PostFilterBackend]
+    fast_list_values = POST_SUMMARY_VALUES
+    fast_list_row = staticmethod(post_summary_row)
+    transition_actions = ("publish", "archive", "draft")
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.transition_actions:
+            return queryset
+        if self.action == "search":
+            return queryset.summarized()
+        if self.action == "list":
+            # Lists never read the body column unless it is asked for.
+            requested = get_requested_fields(self.request)
+            if requested is None:
+                return queryset.summarized()
+            if "body" not in requested:
+                queryset = queryset.defer("body")
+            if "tags" not in requested:
+                return queryset
+        return queryset.with_related()
+
+    def get_serializer_class(self):
+        if self.action == "list" and get_requested_fields(self.request) is None:
+            return PostSummarySerializer
+        return super().get_serializer_class()
+
+    def create(self, request, *args, **kwargs):
+        """Create one post, or many at once when given a list of posts."""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["put", "patch"], url_path="bulk")
+    def bulk_update(self, request):
+        """Update many posts at once, each item identified by its ``id``."""
+        if not isinstance(request.data, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of posts."]})
+        ids = to_pks(item.get("id") for item in request.data if isinstance(item, dict))
+        posts = self.get_queryset().prefetch_related(None).filter(pk__in=ids)
+        serializer = self.get_serializer(
+            list(posts), data=request.data, many=True, partial=request.method == "PATCH"
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], renderer_classes=[NDJSONRenderer])
+    def export(self, request):
+        """Stream posts with their tags and comments as newline-delimited JSON."""
+        response = StreamingHttpResponse(
+            export_posts(self.filter_queryset(self.get_queryset())),
+            content_type=NDJSONRenderer.media_type,
+        )
+        response["Content-Disposition"] = 'attachment; filename="posts.ndjson"'
+        return response
+
+    @action(detail=False, serializer_class=PostSearchResultSerializer)
+    def search(self, request):
+        """Posts containing every word of ``q``, best matches first.
+
+        Accepts the list filters, e.g. ``state``, and returns at most
+        ``limit`` posts without pagination.
+        """
+        params = PostSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        posts = search_posts(
+            self.filter_queryset(self.get_queryset()), params.validated_data["q"]
+        )[: params.validated_data["limit"]]
+        return Response(self.get_serializer(posts, many=True).data)
+
+    @action(detail=True, methods=["post"], serializer_class=PostStateSerializer)
+    def publish(self, request, pk=None):
+        return self._transition("publish")
+
+    @action(detail=True, methods=["post"], serializer_class=PostStateSerializer)
+    def archive(self, request, pk=None):
+        return self._transition("archive")
+
+    @action(detail=True, methods=["post"], serializer_class=PostStateSerializer)
+    def draft(self, request, pk=None):
+        return self._transition("draft")
+
+    def _transition(self, name):
+        """Run a state transition and return only the fields it changed."""
+        post = self.get_object()
+        transition = getattr(post, name)
+        if not can_proceed(transition):
+            return Response(
+                {"detail": f"Cannot {name} a post in {post.state} state."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if not has_transition_perm(transition, self.request.user):
+            raise PermissionDenied(f"You are not allowed to {name} this post.")
+        transition()
+        post.save(update_fields=["state", "updated_at"])
+        return Response(self.get_serializer(post).data)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="transition",
+        serializer_class=PostTransitionSerializer,
+    )
+    def bulk_transition(self, request):
+        """Apply one state transition to many posts, reporting the result per id."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transition = serializer.validated_data["transition"]
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+        results = self.get_queryset().bulk_transition(transition, ids, request.user)
+        return Response(
+            {
+                "transition": transition,
+                "results": [{"id": pk, "result": results[pk]} for pk in ids],
+            }
+        )
+
+
+class FeedViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Published posts, newest first.
+
+    Pages are served from the cache and invalidated whenever a post, comment
+    or tag changes, so repeated reads of the feed do not hit the database.
+    """
+
+    queryset = Post.objects.filter(state=PostState.PUBLISHED)
+    serializer_class = PostSerializer
+    pagination_class = PostPagination
+
+    def get_queryset(self):
+        return super().get_queryset().with_related()
+
+    def list(self, request, *args, **kwargs):
+        key = feed_cache_key(request.build_absolute_uri())
+        data = get_feed_page(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            set_feed_page(key, data)
+        return Response(data)
+
+
+class CommentViewSet(
+    ReplicaReadsMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    pagination_class = CommentPagination
+    filter_backends = [CommentFilterBackend]
+    fast_list_values = COMMENT_VALUES
+    fast_list_row = staticmethod(comment_row)
+    write_throttle_scope = "comment_write"
+
+
+class PostCommentViewSet(
+    ReplicaReadsMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Comments of one post, oldest first.
+
+    Comments are looked up by ``post_id`` and paged on ``(created_at, id)``,
+    which the ``(post, created_at)`` index serves directly. Pass ``since``
+    to poll only for comments created after a point in time.
+    """
 
-class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    pagination_class = CommentPagination
+    filter_backends = [CommentFilterBackend]
+    fast_list_values = COMMENT_VALUES
+    fast_list_row = staticmethod(comment_row)
 
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(post_id=self.kwargs["post_pk"])
+            .select_related("author")
+        )
 
-class TagViewSet(viewsets.ModelViewSet):
+    def list(self, request, *args, **kwargs):
+        if not Post.objects.filter(pk=self.kwargs["post_pk"]).exists():
+            raise NotFound("Post not found.")
+        return super().list(request, *args, **kwargs)
+
+
+class TagViewSet(ReplicaReadsMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    pagination_class = TagPagination
+    fast_list_values = TAG_VALUES
+    fast_list_row = staticmethod(tag_row)
+
+    @action(detail=False, pagination_class=None)
+    def popular(self, request):
+        """The ``limit`` most used tags with their post counts, in one query."""
+        params = PopularTagsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tags = Tag.objects.popular()[: params.validated_data["limit"]]
+        return Response(PopularTagSerializer(tags, many=True).data)
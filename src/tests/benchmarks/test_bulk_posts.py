@@ -0,0 +1,49 @@
+import pytest
+from django.test import Client
+from rest_framework import status
+
+from posts.models import Post
+
+pytestmark = [pytest.mark.benchmark(group="post-create"), pytest.mark.django_db]
+
+CONTENT_TYPE = "application/json"
+
+POSTS_COUNT = 1_000
+
+
+@pytest.fixture(name="posts_data")
+def given_posts_data(user, tag):
+    return [
+        {"title": f"post-{i}", "body": f"body-{i}", "author": user.id, "tag_ids": [tag.id]}
+        for i in range(POSTS_COUNT)
+    ]
+
+
+def assert_all_posts_created(statuses: set):
+    # Every round, whatever their number, creates all posts.
+    assert statuses == {status.HTTP_201_CREATED}
+    created = Post.objects.filter(title__startswith="post-")
+    assert created.count() == POSTS_COUNT * created.filter(title="post-0").count()
+
+
+def test_create_posts_one_request_each(benchmark, client: Client, posts_data):
+    statuses = set()
+
+    def create_posts():
+        for post_data in posts_data:
+            response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
+            statuses.add(response.status_code)
+
+    benchmark.pedantic(create_posts, rounds=3)
+    assert_all_posts_created(statuses)
+
+
+def test_create_posts_in_one_bulk_request(benchmark, client: Client, posts_data):
+    statuses = set()
+
+    def create_posts():
+        response = client.post("/api/posts/", data=posts_data, content_type=CONTENT_TYPE)
+        statuses.add(response.status_code)
+
+    benchmark.pedantic(create_posts, rounds=3)
+    assert_all_posts_created(statuses)
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+from django.test import Client
+
+from blogapi.middleware import get_compressors
+from posts.models import Comment, Post, Tag
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+ROWS_COUNT = 100
+WORDS = [f"word{i}" for i in range(2_000)]
+
+
+@pytest.fixture(autouse=True)
+def given_rows(user):
+    rng = random.Random(0)
+    posts = Post.objects.bulk_create(
+        Post(
+            title=" ".join(rng.choices(WORDS, k=4)),
+            body=" ".join(rng.choices(WORDS, k=200)),
+            author=user,
+        )
+        for _ in range(ROWS_COUNT)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=p, body=" ".join(rng.choices(WORDS, k=30)), author=user) for p in posts
+    )
+    tags = Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(10))
+    for post in posts:
+        post.tags.add(*rng.sample(tags, 3))
+
+
+@pytest.mark.parametrize("encoding", ["identity", *get_compressors()])
+@pytest.mark.parametrize("url", ["/api/posts/", "/api/posts/?page_size=100", "/api/posts/export/"])
+def test_bytes_on_wire(benchmark, client: Client, url, encoding):
+    """Time responses and report their size and the saving over no compression.
+
+    Sizes are stored in ``extra_info``, e.g. of the ``--benchmark-json`` report.
+    """
+    benchmark.group = url
+
+    def get():
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        return response, b"".join(response) if response.streaming else response.content
+
+    response, body = benchmark(get)
+    assert response.status_code == 200
+    assert response.get("Content-Encoding", "identity") == encoding
+    plain = client.get(url)
+    plain_size = len(b"".join(plain) if plain.streaming else plain.content)
+    benchmark.extra_info.update(bytes=len(body), saved=f"{1 - len(body) / plain_size:.0%}")
@@ -0,0 +1,26 @@
+import pytest
+from django.test import Client
+
+from posts.models import Comment, Post, Tag
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+ROWS_COUNT = 100
+
+
+@pytest.fixture(autouse=True)
+def given_rows(user):
+    posts = Post.objects.bulk_create(
+        Post(title=f"post-{i}", body="body " * 100, author=user) for i in range(ROWS_COUNT)
+    )
+    Comment.objects.bulk_create(Comment(post=p, body="comment " * 20, author=user) for p in posts)
+    Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(ROWS_COUNT))
+
+
+@pytest.mark.parametrize("fast_lists", [False, True], ids=["serializers", "fast"])
+@pytest.mark.parametrize("url", ["/api/posts/", "/api/comments/", "/api/tags/"])
+def test_list_page(benchmark, client: Client, settings, url, fast_lists):
+    settings.POSTS_FAST_LISTS = fast_lists
+    benchmark.group = url
+    response = benchmark(client.get, url, {"page_size": ROWS_COUNT})
+    assert len(response.json()["results"]) == ROWS_COUNT
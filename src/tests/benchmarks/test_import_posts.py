@@ -0,0 +1,44 @@
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from posts.models import Post
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+# Number of posts in the imported file, override to try other sizes.
+ROWS_COUNT = int(os.environ.get("IMPORT_BENCHMARK_ROWS", 100_000))
+
+
+@pytest.fixture(name="ndjson_path")
+def given_ndjson_path(user, tmp_path):
+    path = tmp_path / "posts.ndjson"
+    with open(path, "w") as f:
+        for i in range(ROWS_COUNT):
+            record = {
+                "title": f"post-{i}",
+                "body": "body " * 50,
+                "author": user.pk,
+                "state": "published",
+                "tags": [f"tag-{i % 100}", "django"],
+                "comments": [{"body": "comment", "author": user.pk}] if i % 2 else [],
+            }
+            f.write(json.dumps(record) + "\n")
+    return path
+
+
+def test_import_posts(benchmark, ndjson_path):
+    def setup():
+        Post.objects.all().delete()
+
+    benchmark.pedantic(
+        call_command,
+        args=("import_posts", str(ndjson_path)),
+        kwargs={"stdout": StringIO()},
+        setup=setup,
+        rounds=1,
+    )
+    assert Post.objects.count() == ROWS_COUNT
@@ -0,0 +1,39 @@
+import os
+import random
+
+import pytest
+
+from posts.models import Post
+from posts.search import search_posts, unranked_search_posts
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+# Number of searched posts, override to try other sizes.
+ROWS_COUNT = int(os.environ.get("SEARCH_BENCHMARK_ROWS", 100_000))
+WORDS = [f"word{i}" for i in range(5_000)]
+
+
+@pytest.fixture(autouse=True)
+def given_posts(user):
+    rng = random.Random(0)
+    Post.objects.bulk_create(
+        (
+            Post(
+                title=" ".join(rng.choices(WORDS, k=5)),
+                body=" ".join(rng.choices(WORDS, k=100)),
+                author=user,
+            )
+            for _ in range(ROWS_COUNT)
+        ),
+        batch_size=1000,
+    )
+
+
+@pytest.mark.parametrize(
+    "search", [unranked_search_posts, search_posts], ids=["icontains", "full-text"]
+)
+def test_search_posts(benchmark, search):
+    benchmark.group = "search"
+    queryset = Post.objects.summarized()
+    posts = benchmark(lambda: list(search(queryset, "word42 word1337")[:20]))
+    assert posts
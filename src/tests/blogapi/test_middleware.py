@@ -0,0 +1,136 @@
+import gzip
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from blogapi.middleware import CompressionMiddleware, negotiate_encoding
+from posts.models import Post
+
+
+def compress(response, accept_encoding="gzip, deflate, br"):
+    request = RequestFactory().get("/", headers={"Accept-Encoding": accept_encoding})
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@pytest.fixture(name="body")
+def given_body():
+    return b'{"title": "post", "body": "' + b"body " * 1000 + b'"}'
+
+
+class TestNegotiateEncoding:
+    @pytest.mark.parametrize(
+        "accept_encoding,expected",
+        (
+            ("gzip, deflate, br, zstd", "br"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("br;q=0, gzip", "gzip"),
+            ("*", "br"),
+            ("*;q=0", None),
+            ("deflate", None),
+            ("", None),
+        ),
+    )
+    def test_should_pick_best_accepted_encoding(self, accept_encoding, expected):
+        assert negotiate_encoding(accept_encoding, ["br", "zstd", "gzip"]) == expected
+
+
+class TestCompressionMiddleware:
+    def test_should_compress_accepted_encoding(self, body):
+        response = compress(HttpResponse(body, content_type="application/json"), "gzip")
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert gzip.decompress(response.content) == body
+        assert int(response["Content-Length"]) == len(response.content) < len(body)
+
+    def test_should_not_compress_unaccepted_encoding(self, body):
+        response = compress(HttpResponse(body, content_type="application/json"), "identity")
+        assert not response.has_header("Content-Encoding")
+        assert response["Vary"] == "Accept-Encoding"
+        assert response.content == body
+
+    def test_should_not_compress_small_bodies(self, settings):
+        settings.COMPRESSION_MIN_SIZE = 100
+        response = compress(HttpResponse(b"x" * 99, content_type="application/json"))
+        assert not response.has_header("Content-Encoding")
+        assert not response.has_header("Vary")
+
+    @pytest.mark.parametrize(
+        "response",
+        (
+            HttpResponse(b"x" * 2000, content_type="text/event-stream"),
+            HttpResponse(b"x" * 2000, content_type="text/html"),
+            HttpResponse(
+                b"x" * 2000,
+                content_type="application/json",
+                headers={"Cache-Control": "no-transform"},
+            ),
+            HttpResponse(
+                b"x" * 2000, content_type="application/json", headers={"Content-Encoding": "br"}
+            ),
+        ),
+    )
+    def test_should_leave_excluded_responses_alone(self, response):
+        assert compress(response).content == b"x" * 2000
+
+    def test_should_weaken_etag(self, body):
+        response = compress(
+            HttpResponse(body, content_type="application/json", headers={"ETag": '"abc"'}), "gzip"
+        )
+        assert response["ETag"] == 'W/"abc"'
+
+    def test_should_compress_streams_without_buffering(self):
+        # GIVEN a stream which is not consumed before the response is returned
+        consumed = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield b'{"id": %d, "body": "body body body"}\n' % i
+
+        response = compress(
+            StreamingHttpResponse(lines(), content_type="application/x-ndjson"), "gzip"
+        )
+        assert consumed == []
+        assert not response.has_header("Content-Length")
+        # THEN it is compressed while consumed
+        assert gzip.decompress(b"".join(response.streaming_content)) == b"".join(lines())
+
+    def test_should_compress_async_streams(self):
+        async def lines():
+            for i in range(100):
+                yield b"line %d\n" % i
+
+        response = compress(
+            StreamingHttpResponse(lines(), content_type="application/x-ndjson"), "gzip"
+        )
+
+        async def consume():
+            return b"".join([chunk async for chunk in response])
+
+        assert gzip.decompress(async_to_sync(consume)()) == b"".join(
+            b"line %d\n" % i for i in range(100)
+        )
+
+
+@pytest.mark.django_db
+class TestCompressedApi:
+    def test_should_compress_post_list(self, client, user):
+        Post.objects.bulk_create(
+            Post(title=f"post-{i}", body="body " * 100, author=user) for i in range(20)
+        )
+        plain = client.get("/api/posts/")
+        response = client.get("/api/posts/", headers={"Accept-Encoding": "gzip"})
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_should_not_compress_html_pages(self, client, user):
+        # GIVEN the browsable API, whose forms carry a CSRF token
+        client.force_login(user)
+        response = client.get(
+            "/api/posts/", headers={"Accept": "text/html", "Accept-Encoding": "gzip"}
+        )
+        # THEN it is sent uncompressed
+        assert response["Content-Type"].startswith("text/html")
+        assert not response.has_header("Content-Encoding")
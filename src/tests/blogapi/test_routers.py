@@ -0,0 +1,109 @@
+from collections import Counter
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client
+from rest_framework import status
+
+from accounts.models import CustomUser
+from blogapi.routers import ReplicaRouter, replica_reads
+from posts.models import Post, PostState
+
+
+@pytest.fixture(name="replica")
+def given_replica(settings, tmp_path, django_db_blocker):
+    """A SQLite file standing in for a replica of the test database."""
+    alias = "replica"
+    connections.settings[alias] = {
+        **connections.settings["default"],
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    settings.DATABASE_REPLICAS = {alias: 1}
+    with django_db_blocker.unblock():
+        call_command("migrate", database=alias, verbosity=0)
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+    del connections.settings[alias]
+
+
+def replicate(instance, alias):
+    """Copy a row of the primary to the replica, as replication would."""
+    instance.save(using=alias, force_insert=True)
+
+
+class TestReplicaRouter:
+    def test_should_take_turns(self, settings):
+        settings.DATABASE_REPLICAS = {"a": 1, "b": 1}
+        router = ReplicaRouter()
+        assert [router.next_replica() for _ in range(4)] == ["a", "b", "a", "b"]
+
+    def test_should_spread_reads_by_weight(self, settings):
+        settings.DATABASE_REPLICAS = {"a": 1, "b": 3, "drained": 0}
+        router = ReplicaRouter()
+        picks = [router.next_replica() for _ in range(8)]
+        assert Counter(picks) == {"a": 2, "b": 6}
+        # Turns are interleaved rather than taken in runs.
+        assert picks == ["b", "a", "b", "b"] * 2
+
+    def test_should_read_from_replicas_only_when_asked(self, settings):
+        settings.DATABASE_REPLICAS = {"replica": 1}
+        router = ReplicaRouter()
+        assert router.db_for_read(Post) is None
+        with replica_reads():
+            assert router.db_for_read(Post) == "replica"
+            assert router.db_for_write(Post) == "default"
+        assert router.db_for_read(Post) is None
+
+    def test_should_read_from_primary_without_replicas(self, settings):
+        settings.DATABASE_REPLICAS = {}
+        with replica_reads():
+            assert ReplicaRouter().db_for_read(Post) is None
+
+
+@pytest.mark.django_db
+class TestReplicaReads:
+    def test_should_list_posts_from_replica(self, client: Client, replica, user):
+        # GIVEN a post which only reached the replica so far, and one which
+        # only exists on the primary
+        replicate(user, replica)
+        replicate(Post(pk=1000, title="replica", author=user), replica)
+        Post.objects.create(title="primary", author=user)
+        # WHEN posts are listed
+        response = client.get("/api/posts/")
+        # THEN they are read from the replica
+        assert [p["title"] for p in response.json()["results"]] == ["replica"]
+        assert client.get("/api/tags/").status_code == status.HTTP_200_OK
+
+    def test_should_read_own_writes_from_primary(
+        self, client: Client, replica, user, user2, settings
+    ):
+        replicate(user, replica)
+        client.force_login(user)
+        # WHEN a post is created, which is not replicated yet
+        response = client.post("/api/posts/", {"title": "new", "body": "body", "author": user.pk})
+        assert response.status_code == status.HTTP_201_CREATED
+        url = f"/api/posts/{response.json()['id']}/"
+        # THEN its author reads it from the primary
+        assert client.get(url).status_code == status.HTTP_200_OK
+        # AND other users read from the replica, which lags behind
+        other = Client()
+        other.force_login(user2)
+        assert other.get(url).status_code == status.HTTP_404_NOT_FOUND
+        # AND the author is back on the replica once the pin expired
+        settings.DATABASE_REPLICA_PIN_SECONDS = 0
+        client.post("/api/posts/", {"title": "new", "body": "body", "author": user.pk})
+        assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_should_transition_on_primary(self, client: Client, replica, post, user):
+        # GIVEN a replica which has not seen the post yet
+        client.force_login(user)
+        # WHEN it is published
+        response = client.post(f"/api/posts/{post.pk}/publish/")
+        # THEN the transition reads and writes the primary
+        assert response.status_code == status.HTTP_200_OK, response.content
+        post.refresh_from_db()
+        assert post.state == PostState.PUBLISHED
+        assert not Post.objects.using(replica).exists()
+        assert not CustomUser.objects.using(replica).exists()
@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client
+
+
+@pytest.fixture(name="static_client")
+def given_static_client(settings, tmp_path):
+    """A client of the project served with STATIC_SERVE and STATIC_MANIFEST."""
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+    }
+    settings.MIDDLEWARE = [
+        settings.MIDDLEWARE[0],
+        "whitenoise.middleware.WhiteNoiseMiddleware",
+        *settings.MIDDLEWARE[1:],
+    ]
+    call_command("collectstatic", interactive=False, verbosity=0)
+    # WhiteNoise indexes STATIC_ROOT when the middleware is created.
+    return Client()
+
+
+class TestServeStatic:
+    def test_should_cache_hashed_names_for_good(self, static_client):
+        path = staticfiles_storage.stored_name("admin/css/base.css")
+        assert path != "admin/css/base.css"
+        response = static_client.get(f"/static/{path}")
+        assert response.status_code == 200
+        assert "immutable" in response["Cache-Control"]
+
+    def test_should_revalidate_original_names(self, static_client):
+        response = static_client.get("/static/admin/css/base.css")
+        assert response.status_code == 200
+        assert "immutable" not in response["Cache-Control"]
+
+    def test_should_serve_compressed_copies(self, static_client):
+        response = static_client.get(
+            "/static/admin/css/base.css", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.django_db
+class TestStaticLinks:
+    def test_should_render_pages_without_collected_static(self, client, user):
+        # GIVEN the default settings, without collectstatic
+        client.force_login(user)
+        # WHEN pages linking static files are rendered
+        response = client.get("/api/posts/", headers={"Accept": "text/html"})
+        # THEN they link the original names
+        assert response.status_code == 200
+        assert b"/static/rest_framework/css/bootstrap.min.css" in response.content
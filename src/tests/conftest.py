@@ -1,9 +1,17 @@
 import pytest
+from django.core.cache import cache
 
 from accounts.models import CustomUser
 from posts.models import Comment, Post, Tag
 
 
+@pytest.fixture(autouse=True)
+def given_empty_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture(name="user")
 def given_user():
     u = CustomUser.objects.create(username="user")
@@ -51,11 +59,29 @@ def given_post_with_tag(post, tag):
     return post
 
 
+@pytest.fixture(name="published_post")
+def given_published_post(user):
+    p = Post.objects.create(title="published", author=user)
+    p.publish()
+    p.save()
+    return p
+
+
+@pytest.fixture(name="feed_url")
+def given_feed_url():
+    return "/api/feed/"
+
+
 @pytest.fixture(name="comments_url")
 def given_comments_url():
     return "/api/comments/"
 
 
+@pytest.fixture(name="post_comments_url")
+def given_post_comments_url(post):
+    return f"/api/posts/{post.id}/comments/"
+
+
 @pytest.fixture(name="comment")
 def given_comment(post, user):
     c = Comment.objects.create(
@@ -0,0 +1,262 @@
+import asyncio
+import base64
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient, Client
+from rest_framework import status
+
+from posts.models import Comment, Post, PostState, Tag
+from posts.pubsub import comments_channel, get_broker
+
+pytestmark = [pytest.mark.django_db]
+
+
+def walk_async_pages(client: Client, url: str):
+    items, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        items += response.json()["results"]
+        url = response.json()["next"]
+        pages += 1
+    return items, pages
+
+
+async def read_event(stream) -> dict:
+    chunk = await asyncio.wait_for(anext(stream), 5)
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    return {**fields, "data": json.loads(fields["data"]) if "data" in fields else None}
+
+
+async def wait_for_subscribers(channel: str, count: int):
+    while get_broker().count(channel) < count:
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture(name="given_content")
+def given_content(user, user2):
+    posts = Post.objects.bulk_create(
+        Post(title=f"post-{i}", body="body " * 30, author=user) for i in range(5)
+    )
+    tag = Tag.objects.create(name="django")
+    posts[0].tags.add(tag)
+    Comment.objects.bulk_create(
+        Comment(post=posts[0], body=f"comment-{i}", author=user2) for i in range(3)
+    )
+    return posts
+
+
+class TestAsyncViews:
+    @pytest.mark.parametrize(
+        "url,sync_url",
+        (
+            ("/api/async/posts/", "/api/posts/"),
+            ("/api/async/comments/", "/api/comments/"),
+            ("/api/async/tags/", "/api/tags/"),
+        ),
+    )
+    def test_should_list_same_items_as_sync_views(
+        self, client: Client, given_content, url, sync_url
+    ):
+        # WHEN items are listed two per page by both views
+        items, _ = walk_async_pages(client, f"{url}?page_size=2")
+        sync_items = []
+        next_url = f"{sync_url}?page_size=2"
+        while next_url:
+            response = client.get(next_url).json()
+            sync_items += response["results"]
+            next_url = response["next"]
+        # THEN the items and their order are the same
+        assert items == sync_items
+
+    def test_should_walk_post_pages_newest_first(self, client: Client, given_content):
+        items, pages = walk_async_pages(client, "/api/async/posts/?page_size=2")
+        assert [p["id"] for p in items] == [p.id for p in reversed(given_content)]
+        assert pages == 3
+
+    @pytest.mark.parametrize("kind", ["posts", "comments", "tags"])
+    def test_should_retrieve_same_item_as_sync_views(self, client: Client, given_content, kind):
+        pk = {"posts": given_content[0].pk, "comments": Comment.objects.first().pk,
+              "tags": Tag.objects.get().pk}[kind]
+        response = client.get(f"/api/async/{kind}/{pk}/")
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.json() == client.get(f"/api/{kind}/{pk}/").json()
+
+    def test_should_list_post_comments(self, client: Client, given_content):
+        post = given_content[0]
+        items, _ = walk_async_pages(client, f"/api/async/posts/{post.pk}/comments/?page_size=2")
+        assert [c["body"] for c in items] == ["comment-0", "comment-1", "comment-2"]
+
+    def test_should_filter_posts(self, client: Client, given_content):
+        Post.objects.filter(pk=given_content[1].pk).update(state=PostState.PUBLISHED)
+        response = client.get("/api/async/posts/", {"state": "published"})
+        assert [p["id"] for p in response.json()["results"]] == [given_content[1].pk]
+        response = client.get("/api/async/posts/", {"tag": "django"})
+        assert [p["id"] for p in response.json()["results"]] == [given_content[0].pk]
+
+    def test_should_read_in_constant_number_of_queries(
+        self, client: Client, given_content, django_assert_max_num_queries
+    ):
+        with django_assert_max_num_queries(1):
+            client.get("/api/async/posts/?page_size=100")
+        with django_assert_max_num_queries(2):
+            client.get(f"/api/async/posts/{given_content[0].pk}/")
+
+    @pytest.mark.parametrize(
+        "url,expected_status",
+        (
+            ("/api/async/posts/1001/", status.HTTP_404_NOT_FOUND),
+            ("/api/async/posts/1001/comments/", status.HTTP_404_NOT_FOUND),
+            ("/api/async/posts/?cursor=invalid", status.HTTP_404_NOT_FOUND),
+            # Cursors of 5, [1] and ["not a date", 1].
+            ("/api/async/posts/?cursor=NQ==", status.HTTP_404_NOT_FOUND),
+            ("/api/async/posts/?cursor=WzFd", status.HTTP_404_NOT_FOUND),
+            ("/api/async/posts/?cursor=WyJub3QgYSBkYXRlIiwgMV0=", status.HTTP_404_NOT_FOUND),
+            ("/api/async/posts/?state=unknown", status.HTTP_400_BAD_REQUEST),
+            ("/api/async/posts/?created_after=2024-02-30T00:00:00", status.HTTP_400_BAD_REQUEST),
+        ),
+    )
+    def test_should_report_errors_as_json(self, client: Client, url, expected_status):
+        response = client.get(url)
+        assert response.status_code == expected_status, response.content
+        assert response.json()
+
+    def test_should_only_allow_reads(self, client: Client, post_data):
+        response = client.post("/api/async/posts/", data=post_data)
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert response["Allow"] == "GET, HEAD, OPTIONS"
+
+    def test_should_answer_options(self, client: Client):
+        response = client.options("/api/async/posts/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Allow"] == "GET, HEAD, OPTIONS"
+
+    def test_should_throttle(self, client: Client, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "anon_burst": "1/min",
+            },
+        }
+        assert client.get("/api/async/tags/").status_code == status.HTTP_200_OK
+        response = client.get("/api/async/tags/")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "Retry-After" in response
+
+
+    def test_should_throttle_basic_auth_clients_as_users(self, client: Client, settings, user):
+        # GIVEN a user authenticating with HTTP Basic, and a single anonymous request a minute
+        user.set_password("secret")
+        user.save()
+        credentials = base64.b64encode(b"user:secret").decode()
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "anon_burst": "1/min",
+            },
+        }
+        # WHEN the user reads twice
+        for _ in range(2):
+            response = client.get(
+                "/api/async/tags/", headers={"Authorization": f"Basic {credentials}"}
+            )
+            # THEN the user's rates apply
+            assert response.status_code == status.HTTP_200_OK, response.content
+
+    def test_should_reject_wrong_credentials(self, client: Client, user):
+        credentials = base64.b64encode(b"user:wrong").decode()
+        response = client.get("/api/async/tags/", headers={"Authorization": f"Basic {credentials}"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED, response.content
+
+
+class TestCommentStream:
+    def test_should_push_new_comments(
+        self, post, user2, django_capture_on_commit_callbacks
+    ):
+        url = f"/api/posts/{post.pk}/comments/stream/"
+
+        def add_comment():
+            with django_capture_on_commit_callbacks(execute=True):
+                return Comment.objects.create(post=post, author=user2, body="live")
+
+        async def scenario():
+            # GIVEN a client streaming the comments of a post
+            response = await AsyncClient().get(url)
+            assert response["Content-Type"] == "text/event-stream"
+            assert response["Cache-Control"] == "no-cache"
+            stream = aiter(response.streaming_content)
+            event = asyncio.ensure_future(read_event(stream))
+            await wait_for_subscribers(comments_channel(post.pk), 1)
+            # WHEN a comment is added
+            comment = await sync_to_async(add_comment)()
+            # THEN it is pushed to the client
+            expected = await sync_to_async(Client().get)(f"/api/comments/{comment.pk}/")
+            assert await event == {
+                "id": str(comment.pk),
+                "event": "comment",
+                "data": expected.json(),
+            }
+            # AND disconnecting, which cancels the waiting stream, unsubscribes
+            pending = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.01)
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+            assert get_broker().count(comments_channel(post.pk)) == 0
+
+        async_to_sync(scenario)()
+
+    def test_should_require_asgi(self, client: Client, post):
+        # WHEN the stream is requested from a WSGI server
+        response = client.get(f"/api/posts/{post.pk}/comments/stream/")
+        # THEN it is refused instead of never being sent
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED, response.content
+        assert response.json()["detail"]
+
+    def test_should_resume_after_last_event_id(self, post, user2):
+        comments = Comment.objects.bulk_create(
+            Comment(post=post, body=f"comment-{i}", author=user2) for i in range(3)
+        )
+
+        async def scenario():
+            # WHEN a client reconnects after receiving the first comment
+            response = await AsyncClient().get(
+                f"/api/posts/{post.pk}/comments/stream/",
+                headers={"Last-Event-ID": str(comments[0].pk)},
+            )
+            stream = aiter(response.streaming_content)
+            # THEN it receives the comments it missed, oldest first
+            events = [await read_event(stream) for _ in range(2)]
+            assert [e["data"]["body"] for e in events] == ["comment-1", "comment-2"]
+            assert [e["id"] for e in events] == [str(c.pk) for c in comments[1:]]
+
+        async_to_sync(scenario)()
+
+    def test_should_keep_idle_stream_alive(self, post, settings):
+        settings.POSTS_STREAM_KEEPALIVE = 0.01
+
+        async def scenario():
+            response = await AsyncClient().get(f"/api/posts/{post.pk}/comments/stream/")
+            chunk = await asyncio.wait_for(anext(aiter(response.streaming_content)), 5)
+            assert chunk == b": keep-alive\n\n"
+
+        async_to_sync(scenario)()
+
+    @pytest.mark.parametrize(
+        "url,headers,expected_status",
+        (
+            ("/api/posts/1001/comments/stream/", {}, status.HTTP_404_NOT_FOUND),
+            (
+                "/api/posts/{pk}/comments/stream/",
+                {"Last-Event-ID": "x"},
+                status.HTTP_400_BAD_REQUEST,
+            ),
+        ),
+    )
+    def test_should_report_errors_as_json(self, post, url, headers, expected_status):
+        response = async_to_sync(AsyncClient().get)(url.format(pk=post.pk), headers=headers)
+        assert response.status_code == expected_status, response.content
+        assert response.json()
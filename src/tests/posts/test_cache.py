@@ -0,0 +1,50 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from posts import cache as posts_cache
+from posts.cache import get_post_detail, get_post_detail_stats, post_detail_key
+
+
+class TestPostDetailCache:
+    def test_should_serialize_once_for_concurrent_misses(self):
+        # GIVEN a post which takes a while to serialize
+        calls = []
+
+        def serialize():
+            calls.append(1)
+            time.sleep(0.1)
+            return {"id": 1}
+
+        updated_at = timezone.now()
+        results = []
+
+        def read():
+            results.append(get_post_detail(1, updated_at, serialize))
+
+        # WHEN it is read by many requests at once
+        threads = [threading.Thread(target=read) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # THEN one of them serializes it, the others get its result
+        assert results == [{"id": 1}] * 10
+        assert len(calls) == 1
+        assert get_post_detail_stats() == {"hits": 9, "misses": 1}
+
+    def test_should_serialize_when_lock_holder_is_too_slow(self, monkeypatch):
+        monkeypatch.setattr(posts_cache, "POST_DETAIL_LOCK_WAIT", 0.05)
+        cache.add(f"{post_detail_key(1)}:lock", 1)
+        assert get_post_detail(1, timezone.now(), lambda: {"id": 1}) == {"id": 1}
+        assert get_post_detail_stats() == {"hits": 0, "misses": 1}
+
+    def test_should_miss_when_post_was_updated(self):
+        cached_at = timezone.now()
+        get_post_detail(1, cached_at, lambda: {"title": "old"})
+        assert get_post_detail(1, cached_at, lambda: {"title": "new"}) == {"title": "old"}
+        updated_at = cached_at + timedelta(seconds=1)
+        assert get_post_detail(1, updated_at, lambda: {"title": "new"}) == {"title": "new"}
@@ -0,0 +1,156 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from posts.models import Comment, Post, PostTag, Tag
+from posts.ndjson import _bulk_create_with_timestamps
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestRecomputeCommentStats:
+    def test_should_recompute_comment_stats_in_batches(self, user):
+        # GIVEN posts whose comment statistics are out of date
+        posts = Post.objects.bulk_create(Post(author=user) for _ in range(5))
+        comments = Comment.objects.bulk_create(
+            Comment(post=p, author=user) for p in posts for _ in range(p.id % 3)
+        )
+        out = StringIO()
+        # WHEN statistics are recomputed two posts at a time
+        call_command("recompute_comment_stats", batch_size=2, stdout=out)
+        # THEN every post has the right statistics
+        for p in Post.objects.all():
+            post_comments = [c for c in comments if c.post_id == p.id]
+            assert p.comment_count == len(post_comments)
+            assert p.last_commented_at == max(
+                (c.created_at for c in post_comments), default=None
+            )
+        # AND progress is reported per batch
+        assert out.getvalue().count("Recomputed comment statistics") == 3
+
+
+class TestRecomputeTagCounts:
+    def test_should_recompute_tag_counts_in_batches(self, user):
+        # GIVEN tags whose post counts are out of date
+        posts = Post.objects.bulk_create(Post(author=user) for _ in range(3))
+        tags = Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(3))
+        PostTag.objects.bulk_create(
+            PostTag(post=p, tag=t) for i, t in enumerate(tags) for p in posts[:i]
+        )
+        out = StringIO()
+        # WHEN counts are recomputed two tags at a time
+        call_command("recompute_tag_counts", batch_size=2, stdout=out)
+        # THEN every tag has the right count
+        assert [t.post_count for t in Tag.objects.order_by("name")] == [0, 1, 2]
+        # AND progress is reported per batch
+        assert out.getvalue().count("Recomputed post counts") == 2
+
+
+class TestExportPosts:
+    def test_should_export_posts_in_chunks(self, user, django_assert_max_num_queries):
+        # GIVEN five posts with a tag and a comment each
+        posts = Post.objects.bulk_create(Post(title=f"post-{i}", author=user) for i in range(5))
+        tags = Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(5))
+        PostTag.objects.bulk_create(PostTag(post=p, tag=t) for p, t in zip(posts, tags))
+        Comment.objects.bulk_create(Comment(post=p, body=p.title, author=user) for p in posts)
+        out = StringIO()
+        # WHEN posts are exported two at a time
+        with django_assert_max_num_queries(3 * 3):
+            call_command("export_posts", chunk_size=2, stdout=out)
+        # THEN every post is exported with its tag and comment
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [r["id"] for r in records] == [p.id for p in posts]
+        assert [r["tags"] for r in records] == [[t.name] for t in tags]
+        assert [[c["body"] for c in r["comments"]] for r in records] == [[p.title] for p in posts]
+
+    def test_should_export_posts_to_file(self, post, tmp_path):
+        output = tmp_path / "posts.ndjson"
+        call_command("export_posts", output=str(output), stderr=StringIO())
+        (line,) = output.read_bytes().splitlines()
+        assert json.loads(line)["id"] == post.id
+
+
+class TestImportPosts:
+    def test_should_keep_timestamps_of_inserted_rows(self, user):
+        # WHEN posts are inserted with timestamps in the past
+        past = timezone.now() - timedelta(days=30)
+        posts = [Post(author=user, created_at=past, updated_at=past) for _ in range(2)]
+        _bulk_create_with_timestamps(Post, posts)
+        # THEN their primary keys are set and their timestamps stored as they are
+        assert list(
+            Post.objects.filter(pk__in=[p.pk for p in posts]).values_list(
+                "created_at", "updated_at"
+            )
+        ) == [(past, past), (past, past)]
+
+    def test_should_import_exported_posts(self, post_with_tag, tag, comment, tmp_path):
+        # GIVEN an export of a tagged post with a comment
+        path = tmp_path / "posts.ndjson"
+        call_command("export_posts", output=str(path), stderr=StringIO())
+        (exported,) = [json.loads(line) for line in path.read_bytes().splitlines()]
+        Post.objects.all().delete()
+        out = StringIO()
+        # WHEN the export is imported
+        call_command("import_posts", str(path), stdout=out)
+        # THEN the post is recreated with its timestamps, tag and comment
+        imported = Post.objects.get()
+        assert imported.pk != exported["id"]
+        assert (imported.title, imported.body, imported.state) == (
+            exported["title"],
+            exported["body"],
+            exported["state"],
+        )
+        assert imported.created_at.isoformat().replace("+00:00", "Z") == exported["created_at"]
+        assert [t.name for t in imported.tags.all()] == exported["tags"] == [tag.name]
+        assert [c.body for c in imported.comments.all()] == [
+            c["body"] for c in exported["comments"]
+        ]
+        assert imported.comment_count == 1
+        assert imported.last_commented_at == imported.comments.get().created_at
+        # AND existing tags are reused and recounted
+        assert Tag.objects.get().post_count == 1
+        assert "Imported 1 posts" in out.getvalue()
+
+    def test_should_import_in_batches(self, user, tmp_path, django_assert_max_num_queries):
+        # GIVEN five posts sharing a tag
+        path = tmp_path / "posts.ndjson"
+        path.write_text(
+            "\n".join(
+                json.dumps({"title": f"post-{i}", "author": user.pk, "tags": ["django"]})
+                for i in range(5)
+            )
+        )
+        out = StringIO()
+        # WHEN they are imported two at a time
+        with django_assert_max_num_queries(3 * 12 + 1):
+            call_command("import_posts", str(path), batch_size=2, stdout=out)
+        # THEN every post is linked to a single shared tag
+        assert Post.objects.count() == 5
+        assert Tag.objects.get().posts.count() == 5
+        # AND progress is reported per batch
+        assert out.getvalue().count("posts...") == 3
+
+    def test_should_reject_invalid_line(self, user, tmp_path):
+        # GIVEN a file whose second line refers to an unknown author
+        path = tmp_path / "posts.ndjson"
+        path.write_text(
+            json.dumps({"title": "ok", "author": user.pk})
+            + "\n"
+            + json.dumps({"title": "bad", "author": user.pk + 1})
+        )
+        # WHEN it is imported THEN the line is reported
+        with pytest.raises(CommandError, match="Line 2: unknown author"):
+            call_command("import_posts", str(path), stdout=StringIO())
+        # AND the failing batch is rolled back
+        assert not Post.objects.exists()
+
+    @pytest.mark.parametrize("created_at", ["yesterday", "2024-02-30T00:00:00", 5])
+    def test_should_reject_invalid_timestamp(self, user, tmp_path, created_at):
+        path = tmp_path / "posts.ndjson"
+        path.write_text(json.dumps({"title": "bad", "author": user.pk, "created_at": created_at}))
+        with pytest.raises(CommandError, match="Line 1: 'created_at' must be an ISO 8601"):
+            call_command("import_posts", str(path), stdout=StringIO())
@@ -1,6 +1,7 @@
 import pytest
+from django.utils import timezone
 
-from posts.models import Comment, Post, PostTag, Tag
+from posts.models import Comment, Post, PostState, PostTag, Tag
 
 pytestmark = pytest.mark.model
 
@@ -55,6 +56,79 @@ class TestComment:
             comment.refresh_from_db()
 
 
+class TestPostCommentStats:
+    @pytest.mark.django_db
+    def test_should_count_created_comments(self, post: Post, user):
+        # WHEN two comments are created
+        Comment.objects.create(post=post, author=user)
+        latest = Comment.objects.create(post=post, author=user)
+        # THEN the post counts them
+        post.refresh_from_db()
+        assert post.comment_count == 2
+        # AND remembers when it was last commented
+        assert post.last_commented_at == latest.created_at
+
+    @pytest.mark.django_db
+    def test_should_uncount_deleted_comments(self, post: Post, user):
+        # GIVEN two comments
+        first = Comment.objects.create(post=post, author=user)
+        latest = Comment.objects.create(post=post, author=user)
+        # WHEN the latest comment is deleted
+        latest.delete()
+        # THEN the post counts the remaining comment
+        post.refresh_from_db()
+        assert post.comment_count == 1
+        assert post.last_commented_at == first.created_at
+        # AND after deleting the last one, nothing
+        first.delete()
+        post.refresh_from_db()
+        assert (post.comment_count, post.last_commented_at) == (0, None)
+
+    @pytest.mark.django_db
+    def test_should_not_count_below_zero(self, post: Post, user):
+        # GIVEN a comment written in bulk, which was not counted
+        (comment,) = Comment.objects.bulk_create([Comment(post=post, author=user)])
+        # WHEN it is deleted
+        comment.delete()
+        # THEN the count stays at zero
+        post.refresh_from_db()
+        assert post.comment_count == 0
+
+    @pytest.mark.django_db
+    def test_should_not_count_comments_loaded_from_fixtures(self, post: Post, user):
+        # GIVEN a post whose statistics were loaded along with it
+        Post.objects.filter(pk=post.pk).update(comment_count=1)
+        # WHEN its comment is loaded, as loaddata saves it
+        now = timezone.now()
+        Comment(post=post, author=user, created_at=now, updated_at=now).save_base(raw=True)
+        # THEN it is not counted again
+        post.refresh_from_db()
+        assert post.comment_count == 1
+
+    @pytest.mark.django_db
+    def test_should_recount_comment_moved_to_other_post(self, post: Post, comment: Comment, user):
+        other_post = Post.objects.create(author=user)
+        # WHEN the comment moves to the other post
+        comment.post = other_post
+        comment.save()
+        # THEN it is counted for the other post only
+        post.refresh_from_db()
+        other_post.refresh_from_db()
+        assert (post.comment_count, post.last_commented_at) == (0, None)
+        assert (other_post.comment_count, other_post.last_commented_at) == (1, comment.created_at)
+
+    @pytest.mark.django_db
+    def test_should_not_recount_comments_of_deleted_post(
+        self, post: Post, user, django_assert_max_num_queries
+    ):
+        Comment.objects.bulk_create(Comment(post=post, author=user) for _ in range(20))
+        # WHEN the post is deleted
+        with django_assert_max_num_queries(8):
+            post.delete()
+        # THEN its comments are gone without updating the post per comment
+        assert not Comment.objects.exists()
+
+
 class TestTag:
     @pytest.mark.django_db
     def test_should_create_tag_instance(self):
@@ -90,3 +164,118 @@ class TestTag:
         tag.refresh_from_db()
         # AND post link to tag is deleted
         assert not PostTag.objects.filter(tag=tag).all()
+
+
+class TestTagPostCount:
+    @pytest.mark.django_db
+    def test_should_count_tags_added_and_removed_through_posts(self, post: Post, user):
+        # GIVEN two tags
+        tags = Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(2))
+        other = Post.objects.create(title="other", author=user)
+        # WHEN they are added to posts from both sides
+        post.tags.add(*tags)
+        tags[0].posts.add(other)
+        # THEN their post counts follow
+        assert [t.post_count for t in Tag.objects.order_by("name")] == [2, 1]
+        # WHEN they are removed and cleared
+        post.tags.remove(tags[1])
+        tags[0].posts.clear()
+        # THEN their post counts follow
+        assert [t.post_count for t in Tag.objects.order_by("name")] == [0, 0]
+
+    @pytest.mark.django_db
+    def test_should_count_cleared_tags(self, post_with_tag: Post, tag: Tag):
+        post_with_tag.tags.clear()
+        tag.refresh_from_db()
+        assert tag.post_count == 0
+
+    @pytest.mark.django_db
+    def test_should_count_replaced_tags(self, post_with_tag: Post, tag: Tag):
+        # WHEN the post's tags are replaced in bulk
+        new_tag = Tag.objects.create(name="new")
+        PostTag.objects.replace({post_with_tag.pk: [new_tag.pk]})
+        # THEN both the removed and the added tag are recounted
+        tag.refresh_from_db()
+        new_tag.refresh_from_db()
+        assert (tag.post_count, new_tag.post_count) == (0, 1)
+
+    @pytest.mark.django_db
+    def test_should_count_links_written_directly(self, post: Post, tag: Tag):
+        # WHEN a link is created directly
+        link = PostTag.objects.create(post=post, tag=tag)
+        # THEN the tag is counted and the post marked as modified
+        tag.refresh_from_db()
+        assert tag.post_count == 1
+        updated_at = post.updated_at
+        post.refresh_from_db()
+        assert post.updated_at > updated_at
+        # WHEN it is deleted directly
+        link.delete()
+        # THEN the tag is no longer counted and the post is modified again
+        tag.refresh_from_db()
+        assert tag.post_count == 0
+        updated_at = post.updated_at
+        post.refresh_from_db()
+        assert post.updated_at > updated_at
+
+    @pytest.mark.django_db
+    def test_should_shift_counts_without_recounting(self, post: Post, tag: Tag):
+        # GIVEN a count which is off, as only the repair command notices
+        Tag.objects.filter(pk=tag.pk).update(post_count=5)
+        # WHEN a link is added and removed
+        post.tags.add(tag)
+        tag.refresh_from_db()
+        assert tag.post_count == 6
+        post.tags.remove(tag)
+        # THEN the count was shifted rather than recounted
+        tag.refresh_from_db()
+        assert tag.post_count == 5
+
+    @pytest.mark.django_db
+    def test_should_not_count_below_zero(self, post: Post, tag: Tag):
+        # GIVEN a link written in bulk, which was not counted
+        PostTag.objects.bulk_create([PostTag(post=post, tag=tag)])
+        # WHEN its post is deleted
+        post.delete()
+        # THEN the count stays at zero
+        tag.refresh_from_db()
+        assert tag.post_count == 0
+
+    @pytest.mark.django_db
+    def test_should_count_tags_of_deleted_post(self, post_with_tag: Post, tag: Tag):
+        post_with_tag.delete()
+        tag.refresh_from_db()
+        assert tag.post_count == 0
+
+
+class TestQueryPlans:
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "make_queryset,expected_index",
+        (
+            (
+                lambda user: Post.objects.filter(state=PostState.PUBLISHED).order_by("-created_at"),
+                "post_state_created_idx",
+            ),
+            (
+                lambda user: Post.objects.filter(author=user).order_by("-created_at"),
+                "post_author_created_idx",
+            ),
+            (
+                lambda user: Comment.objects.filter(post_id=1).order_by("created_at", "id"),
+                "comment_post_created_idx",
+            ),
+            (
+                lambda user: Tag.objects.popular(),
+                "tag_post_count_idx",
+            ),
+        ),
+        ids=["published-feed", "author-posts", "post-comments", "popular-tags"],
+    )
+    def test_should_use_index_for_hot_query(self, user, make_queryset, expected_index):
+        # WHEN the query plan of a hot query is explained
+        plan = make_queryset(user).explain()
+        # THEN the expected index is used
+        assert expected_index in plan, plan
+        # AND no extra sort step is needed for the ordering
+        assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+
+from posts.pubsub import OVERFLOW, LocalBroker, get_broker
+
+
+class TestLocalBroker:
+    def test_should_deliver_to_subscribers_of_channel(self):
+        broker = LocalBroker()
+
+        async def scenario():
+            async with broker.subscribe("a") as a, broker.subscribe("b") as b:
+                broker.publish("a", 1)
+                assert await a.get() == 1
+                assert b.queue.empty()
+            assert broker.count("a") == 0
+
+        async_to_sync(scenario)()
+
+    def test_should_deliver_messages_published_from_other_threads(self):
+        broker = LocalBroker()
+
+        async def scenario():
+            async with broker.subscribe("a") as subscription:
+                thread = threading.Thread(target=broker.publish, args=("a", 1))
+                thread.start()
+                assert await asyncio.wait_for(subscription.get(), 5) == 1
+                thread.join()
+
+        async_to_sync(scenario)()
+
+    def test_should_hold_many_subscribers_in_bounded_memory(self, settings):
+        # GIVEN 1,000 subscribers which do not read their messages
+        settings.POSTS_PUBSUB_QUEUE_SIZE = 10
+        broker = LocalBroker()
+        message = {"id": 1, "body": "x" * 100}
+
+        async def publish_rounds(rounds):
+            for _ in range(rounds):
+                broker.publish("comments", message)
+                await asyncio.sleep(0)
+
+        async def scenario():
+            subscriptions = [broker.subscribe("comments") for _ in range(1000)]
+            # Fill and overflow the queues once so they are allocated.
+            await publish_rounds(2 * settings.POSTS_PUBSUB_QUEUE_SIZE)
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                # WHEN ten times more messages than they can buffer are published
+                await publish_rounds(10 * settings.POSTS_PUBSUB_QUEUE_SIZE)
+                grown = tracemalloc.get_traced_memory()[0] - before
+            finally:
+                tracemalloc.stop()
+            # THEN memory does not grow with the published messages, queues
+            # only swap their storage blocks (unbounded ones would hold 8 MB)
+            assert grown < 1024 * len(subscriptions)
+            assert all(s.queue.qsize() <= s.queue.maxsize for s in subscriptions)
+            # AND every subscriber learns that it missed messages
+            for subscription in subscriptions:
+                queue = subscription.queue
+                received = [queue.get_nowait() for _ in range(queue.qsize())]
+                assert OVERFLOW in received
+                subscription.close()
+            assert broker.count("comments") == 0
+
+        async_to_sync(scenario)()
+
+    def test_should_load_configured_broker_once(self, settings):
+        settings.POSTS_PUBSUB_BACKEND = "posts.pubsub.LocalBroker"
+        assert isinstance(get_broker(), LocalBroker)
+        assert get_broker() is get_broker()
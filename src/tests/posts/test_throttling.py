@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import Client
+from rest_framework import status
+
+from posts.throttling import AnonBurstRateThrottle, CounterRateThrottle
+
+pytestmark = [pytest.mark.django_db]
+
+CONTENT_TYPE = "application/json"
+
+
+@pytest.fixture(autouse=True)
+def frozen_timer(monkeypatch):
+    # Keep every request of a test in the same fixed window.
+    monkeypatch.setattr(CounterRateThrottle, "timer", staticmethod(lambda: 30.0))
+
+
+@pytest.fixture(name="set_rates")
+def given_set_rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                **rates,
+            },
+        }
+
+    return set_rates
+
+
+class TestThrottling:
+    def test_should_throttle_anonymous_bursts(self, client: Client, set_rates, tags_url):
+        set_rates(anon_burst="3/min")
+        # WHEN more requests than allowed are sent
+        responses = [client.get(tags_url) for _ in range(4)]
+        # THEN the extra request is throttled with a hint when to retry
+        assert [r.status_code for r in responses] == [200, 200, 200, 429]
+        assert responses[-1]["Retry-After"] == "30"
+
+    def test_should_throttle_anonymous_clients_by_address(
+        self, client: Client, set_rates, tags_url
+    ):
+        set_rates(anon_burst="1/min")
+        assert client.get(tags_url, REMOTE_ADDR="10.0.0.1").status_code == status.HTTP_200_OK
+        assert client.get(tags_url, REMOTE_ADDR="10.0.0.2").status_code == status.HTTP_200_OK
+        response = client.get(tags_url, REMOTE_ADDR="10.0.0.1")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_should_throttle_users_separately(self, client: Client, set_rates, user, user2):
+        set_rates(anon_burst="1/min", user_burst="2/min")
+        # GIVEN a user who used up their requests
+        client.force_login(user)
+        assert [client.get("/api/posts/").status_code for _ in range(3)] == [200, 200, 429]
+        # THEN another user behind the same address is not throttled
+        client.force_login(user2)
+        assert client.get("/api/posts/").status_code == status.HTTP_200_OK
+
+    def test_should_apply_sustained_rate(self, client: Client, set_rates, tags_url):
+        set_rates(anon_sustained="2/day")
+        assert [client.get(tags_url).status_code for _ in range(3)] == [200, 200, 429]
+
+    def test_should_not_throttle_disabled_scopes(self, client: Client, set_rates, tags_url):
+        set_rates(anon_burst=None, anon_sustained=None)
+        assert all(client.get(tags_url).status_code == 200 for _ in range(200))
+
+    def test_should_throttle_comment_writes_only(
+        self, client: Client, set_rates, comments_url, comment_data
+    ):
+        set_rates(comment_write="2/min")
+        # WHEN more comments than allowed are written
+        statuses = [
+            client.post(comments_url, data=comment_data, content_type=CONTENT_TYPE).status_code
+            for _ in range(3)
+        ]
+        # THEN the extra comment is rejected
+        assert statuses == [201, 201, 429]
+        # AND comments can still be read
+        assert client.get(comments_url).status_code == status.HTTP_200_OK
+
+    def test_should_start_a_new_window(self, set_rates, monkeypatch):
+        set_rates(anon_burst="1/min")
+        request = SimpleNamespace(
+            user=AnonymousUser(), META={"REMOTE_ADDR": "10.0.0.1"}, headers={}
+        )
+        throttle = AnonBurstRateThrottle()
+        assert throttle.allow_request(request, None)
+        assert not throttle.allow_request(request, None)
+        assert throttle.wait() == 30
+        # WHEN the next window starts THEN requests are allowed again
+        monkeypatch.setattr(throttle, "timer", lambda: 60.0)
+        assert throttle.allow_request(request, None)
+
+    def test_should_count_concurrent_requests_exactly(self, set_rates):
+        set_rates(anon_burst="25/min")
+        request = SimpleNamespace(
+            user=AnonymousUser(), META={"REMOTE_ADDR": "10.0.0.1"}, headers={}
+        )
+        # WHEN many requests of one client are checked concurrently
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            allowed = list(
+                executor.map(
+                    lambda _: AnonBurstRateThrottle().allow_request(request, None), range(100)
+                )
+            )
+        # THEN exactly the allowed number gets through
+        assert allowed.count(True) == 25
@@ -1,14 +1,43 @@
+import json
+from datetime import timedelta
+
 import pytest
 
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
 from django.test import Client
+from django.utils.http import http_date
 from rest_framework import status
 
-from posts.models import Comment, Post, Tag
+from posts.cache import get_post_detail_stats
+from posts.models import Comment, Post, PostState, PostTag, Tag
+from posts.serializers import PostSummarySerializer
+from posts.views import FeedViewSet
 
 pytestmark = [pytest.mark.django_db]
 
 CONTENT_TYPE = "application/json"
 
+# Listing posts must not issue per-post queries: one query for the ETag
+# validators, one for the posts (with authors joined) and one for the
+# prefetched tags.
+MAX_POST_LIST_QUERIES = 3
+
+
+def walk_pages(client: Client, url: str) -> tuple[list, int]:
+    """Follow the ``next`` links starting at ``url``.
+
+    Returns all listed items together with the number of pages fetched.
+    """
+    items, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        items.extend(response.data["results"])
+        pages += 1
+        url = response.data["next"]
+    return items, pages
+
 
 class TestPostUrls:
     def test_should_list_posts(self, client: Client, post):
@@ -16,10 +45,111 @@ class TestPostUrls:
         # THEN request is successfull
         assert response.status_code == status.HTTP_200_OK, response.content
         # AND response contains all expected posts
-        (actual_post_data,) = response.data
+        (actual_post_data,) = response.data["results"]
         # AND acutal posts match expected
         assert post.id == actual_post_data["id"]
 
+    @pytest.mark.parametrize("posts_count", [1, 10, 50])
+    def test_should_list_posts_with_constant_number_of_queries(
+        self, client: Client, user, django_assert_max_num_queries, posts_count
+    ):
+        # GIVEN posts_count posts, each with its own tags
+        posts = Post.objects.bulk_create(
+            Post(title=f"post-{i}", body=f"body-{i}", author=user) for i in range(posts_count)
+        )
+        tags = Tag.objects.bulk_create(Tag(name=f"tag-{i}") for i in range(posts_count))
+        PostTag.objects.bulk_create(PostTag(post=p, tag=t) for p, t in zip(posts, tags))
+        # WHEN posts are listed
+        with django_assert_max_num_queries(MAX_POST_LIST_QUERIES):
+            response = client.get(f"/api/posts/?page_size={posts_count}&fields=id,tags")
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND every post is listed with its tags
+        results = response.data["results"]
+        assert len(results) == posts_count
+        assert all(len(actual_post_data["tags"]) == 1 for actual_post_data in results)
+
+    def test_should_list_compact_posts_without_reading_body(
+        self, client: Client, user, django_assert_max_num_queries
+    ):
+        # GIVEN a post with a long body
+        post = Post.objects.create(title="long", body="x" * 1000, author=user)
+        # WHEN posts are listed
+        with django_assert_max_num_queries(MAX_POST_LIST_QUERIES) as captured:
+            response = client.get("/api/posts/")
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND the compact representation with a truncated excerpt is listed
+        (actual_post_data,) = response.data["results"]
+        assert actual_post_data == {
+            "id": post.id,
+            "title": "long",
+            "author": user.id,
+            "state": PostState.DRAFT,
+            "created_at": actual_post_data["created_at"],
+            "comment_count": 0,
+            "excerpt": "x" * 100 + "...",
+        }
+        # AND the body column is only read for the excerpt
+        sql = " ".join(q["sql"] for q in captured.captured_queries)
+        assert sql.count('"posts_post"."body"') == sql.count('SUBSTR("posts_post"."body"')
+
+    def test_should_list_short_body_as_excerpt(self, client: Client, post_data, user):
+        Post.objects.create(title="short", body="short body", author=user)
+        response = client.get("/api/posts/")
+        (actual_post_data,) = response.data["results"]
+        assert actual_post_data["excerpt"] == "short body"
+
+    @pytest.mark.parametrize(
+        "url,fields",
+        (
+            ("/api/posts/", ["id", "title"]),
+            ("/api/posts/", ["id", "body", "tags"]),
+            ("/api/comments/", ["id", "body"]),
+            ("/api/tags/", ["name"]),
+        ),
+    )
+    def test_should_list_only_requested_fields(self, client: Client, comment, tag, url, fields):
+        response = client.get(url, {"fields": ",".join(fields)})
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND only the requested fields are listed
+        (actual_data,) = response.data["results"]
+        assert list(actual_data) == fields
+
+    def test_should_retrieve_only_requested_fields(self, client: Client, post_url):
+        response = client.get(post_url, {"fields": "id,state"})
+        assert list(response.data) == ["id", "state"]
+
+    def test_should_reject_unknown_fields(self, client: Client, post):
+        response = client.get("/api/posts/", {"fields": "id,tag_ids"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "fields" in response.data
+
+    def test_should_ignore_fields_on_write(self, client: Client, post_data):
+        response = client.post("/api/posts/?fields=id", data=post_data, content_type=CONTENT_TYPE)
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        assert response.data["title"] == post_data["title"]
+
+    def test_should_walk_post_pages_newest_first(self, client: Client, user):
+        # GIVEN five posts
+        posts = [Post.objects.create(title=f"post-{i}", author=user) for i in range(5)]
+        # WHEN posts are listed two per page
+        actual_posts_data, pages = walk_pages(client, "/api/posts/?page_size=2")
+        # THEN all posts are listed exactly once, newest first
+        assert [p["id"] for p in actual_posts_data] == [p.id for p in reversed(posts)]
+        # AND the listing spans three pages
+        assert pages == 3
+
+    def test_should_cap_post_page_size(self, client: Client, user):
+        # GIVEN more posts than the maximum page size
+        Post.objects.bulk_create(Post(title=f"post-{i}", author=user) for i in range(101))
+        # WHEN a bigger page is requested
+        response = client.get("/api/posts/?page_size=1000")
+        # THEN the page is capped to the maximum page size
+        assert len(response.data["results"]) == 100
+        assert response.data["next"]
+
     def test_should_create_posts(self, client: Client, post_data):
         response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
         # THEN request is successfull
@@ -29,6 +159,112 @@ class TestPostUrls:
         assert actual_post.body == post_data["body"]
         assert actual_post.author.id == post_data["author"]
 
+    def test_should_create_post_with_tags(self, client: Client, post_data, tag):
+        post_data["tag_ids"] = [tag.id]
+        response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        # AND the post is tagged
+        assert [t["id"] for t in response.data["tags"]] == [tag.id]
+        assert list(Post.objects.get(pk=response.data["id"]).tags.all()) == [tag]
+
+    def test_should_reject_post_with_unknown_tags(self, client: Client, post_data):
+        post_data["tag_ids"] = [1001]
+        response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
+        # THEN request is rejected
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "tag_ids" in response.data
+        # AND no post is created
+        assert not Post.objects.exists()
+
+    @pytest.mark.parametrize("posts_count", [1, 10, 100])
+    def test_should_bulk_create_posts_with_constant_number_of_queries(
+        self, client: Client, user, tag, django_assert_max_num_queries, posts_count
+    ):
+        posts_data = [
+            {"title": f"post-{i}", "body": f"body-{i}", "author": user.id, "tag_ids": [tag.id]}
+            for i in range(posts_count)
+        ]
+        # WHEN posts are created in one request
+        with django_assert_max_num_queries(12):
+            response = client.post("/api/posts/", data=posts_data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        # AND all posts are created in payload order, tagged
+        assert [p["title"] for p in response.data] == [p["title"] for p in posts_data]
+        assert all([t["id"] for t in p["tags"]] == [tag.id] for p in response.data)
+        assert Post.objects.filter(tags=tag).count() == posts_count
+
+    def test_should_not_create_any_post_when_one_is_invalid(self, client: Client, user):
+        posts_data = [
+            {"title": "post-1", "body": "body-1", "author": user.id},
+            {"title": "post-2", "body": "body-2", "author": 1001},
+        ]
+        # WHEN posts are created in one request
+        response = client.post("/api/posts/", data=posts_data, content_type=CONTENT_TYPE)
+        # THEN request is rejected with the errors of each item
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert list(response.data) == [1]
+        assert "author" in response.data[1]
+        # AND no post is created
+        assert not Post.objects.exists()
+
+    def test_should_bulk_update_posts(self, client: Client, user, tag):
+        # GIVEN two posts, the first one tagged
+        first, second = Post.objects.bulk_create(
+            Post(title=f"post-{i}", body=f"body-{i}", author=user) for i in range(2)
+        )
+        first.tags.add(tag)
+        posts_data = [
+            {
+                "id": second.id,
+                "title": "second",
+                "body": "2",
+                "author": user.id,
+                "tag_ids": [tag.id],
+            },
+            {"id": first.id, "title": "first", "body": "1", "author": user.id, "tag_ids": []},
+        ]
+        # WHEN both are updated in one request
+        response = client.put("/api/posts/bulk/", data=posts_data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [p["id"] for p in response.data] == [second.id, first.id]
+        # AND the posts and their tags are updated
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.title, first.body, list(first.tags.all())) == ("first", "1", [])
+        assert (second.title, second.body, list(second.tags.all())) == ("second", "2", [tag])
+        # AND their modification time moved
+        assert first.updated_at > first.created_at
+
+    def test_should_bulk_patch_posts(self, client: Client, post, post_with_tag, tag):
+        # WHEN only the title is sent
+        response = client.patch(
+            "/api/posts/bulk/",
+            data=[{"id": post.id, "title": "patched"}],
+            content_type=CONTENT_TYPE,
+        )
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND only the title changed
+        post.refresh_from_db()
+        assert post.title == "patched"
+        assert list(post.tags.all()) == [tag]
+
+    def test_should_fail_to_bulk_update_non_existing_post(self, client: Client, post):
+        response = client.patch(
+            "/api/posts/bulk/",
+            data=[{"id": post.id, "title": "patched"}, {"id": 1001, "title": "missing"}],
+            content_type=CONTENT_TYPE,
+        )
+        # THEN request is rejected
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "id" in response.data[1]
+        # AND no post is updated
+        post.refresh_from_db()
+        assert post.title != "patched"
+
     def test_should_retrieve_existing_post(self, client, post_url, post):
         response = client.get(post_url)
         # THEN
@@ -39,6 +275,13 @@ class TestPostUrls:
         assert post.body == actual_post_data["body"]
         assert post.author.id == actual_post_data["author"]
 
+    def test_should_retrieve_post_comment_stats(self, client, post_url, post, comment):
+        response = client.get(post_url)
+        # THEN
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.data["comment_count"] == 1
+        assert response.data["last_commented_at"]
+
     def test_should_fail_to_retrieve_non_existing_post(self, client, missing_post_url):
         response = client.get(missing_post_url)
         # THEN
@@ -56,6 +299,52 @@ class TestPostUrls:
         post.refresh_from_db()
         assert post.title == updated_title
 
+    def test_should_create_post_with_tag_names(self, client: Client, post_data, tag):
+        post_data["tag_names"] = [tag.name, "new", "new"]
+        response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        # AND the existing tag is reused and the new one created once
+        assert sorted(t["name"] for t in response.data["tags"]) == sorted([tag.name, "new"])
+        assert Tag.objects.count() == 2
+
+    def test_should_reject_both_tag_ids_and_tag_names(self, client: Client, post_data, tag):
+        post_data.update(tag_ids=[tag.id], tag_names=[tag.name])
+        response = client.post("/api/posts/", data=post_data, content_type=CONTENT_TYPE)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+
+    @pytest.mark.parametrize("tags_count", [1, 10, 100])
+    def test_should_update_tag_names_with_constant_number_of_queries(
+        self, client: Client, post, post_url, django_assert_max_num_queries, tags_count
+    ):
+        # GIVEN a post with half of the tags it is going to have
+        names = [f"tag-{i}" for i in range(tags_count)]
+        tags = Tag.objects.bulk_create(Tag(name=name) for name in names[::2])
+        PostTag.objects.bulk_create(PostTag(post=post, tag=t) for t in tags)
+        PostTag.objects.create(post=post, tag=Tag.objects.create(name="stale"))
+        # WHEN its tags are replaced by name
+        with django_assert_max_num_queries(16):
+            response = client.patch(
+                post_url, data={"tag_names": names}, content_type=CONTENT_TYPE
+            )
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND the post has exactly the requested tags
+        assert sorted(t["name"] for t in response.data["tags"]) == sorted(names)
+        assert sorted(post.tags.values_list("name", flat=True)) == sorted(names)
+
+    def test_should_bulk_create_posts_with_tag_names(self, client: Client, user):
+        posts_data = [
+            {"title": f"post-{i}", "body": "body", "author": user.id, "tag_names": ["a", f"b{i}"]}
+            for i in range(3)
+        ]
+        response = client.post("/api/posts/", data=posts_data, content_type=CONTENT_TYPE)
+        assert response.status_code == status.HTTP_201_CREATED, response.content
+        assert [sorted(t["name"] for t in p["tags"]) for p in response.data] == [
+            ["a", f"b{i}"] for i in range(3)
+        ]
+        assert Tag.objects.get(name="a").posts.count() == 3
+
     def test_should_fail_to_update_non_existing_post(self, client, missing_post_url):
         response = client.put(missing_post_url, content_type=CONTENT_TYPE)
         # THEN
@@ -75,16 +364,776 @@ class TestPostUrls:
 
 
 
+class TestPostExportUrls:
+    url = "/api/posts/export/"
+
+    def test_should_stream_posts_with_tags_and_comments(
+        self, client: Client, post_with_tag, tag, comment, user
+    ):
+        other_post = Post.objects.create(title="other", author=user)
+        # WHEN posts are exported
+        response = client.get(self.url)
+        # THEN the export is streamed as NDJSON
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        lines = b"".join(response.streaming_content).splitlines()
+        # AND every post is one line, with its tags and comments
+        first, second = (json.loads(line) for line in lines)
+        assert first["id"] == post_with_tag.id
+        assert first["tags"] == [tag.name]
+        assert [c["id"] for c in first["comments"]] == [comment.id]
+        assert (second["id"], second["tags"], second["comments"]) == (other_post.id, [], [])
+
+    def test_should_export_filtered_posts(self, client: Client, post, published_post):
+        response = client.get(self.url, {"state": "published"}, HTTP_ACCEPT="application/x-ndjson")
+        lines = b"".join(response.streaming_content).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [published_post.id]
+
+    def test_should_render_export_errors_as_ndjson(self, client: Client):
+        response = client.get(self.url, {"state": "deleted"}, HTTP_ACCEPT="application/x-ndjson")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "state" in json.loads(response.content)
+
+
+class TestPostStateUrls:
+    def test_should_expose_state(self, client: Client, post_url):
+        response = client.get(post_url)
+        assert response.data["state"] == PostState.DRAFT
+
+    def test_should_ignore_written_state(self, client: Client, post, post_url, post_data):
+        post_data["state"] = PostState.PUBLISHED
+        # WHEN the state is sent along with an update
+        response = client.put(post_url, data=post_data, content_type=CONTENT_TYPE)
+        # THEN the update succeeds but the state does not change
+        assert response.status_code == status.HTTP_200_OK, response.content
+        post.refresh_from_db()
+        assert post.state == PostState.DRAFT
+
+    def test_should_filter_posts_by_state(self, client: Client, post, published_post):
+        response = client.get("/api/posts/?state=published")
+        assert [p["id"] for p in response.data["results"]] == [published_post.id]
+
+    def test_should_reject_unknown_state_filter(self, client: Client, post):
+        response = client.get("/api/posts/?state=deleted")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "state" in response.data
+
+    @pytest.mark.parametrize(
+        "initial_state,transition,expected_state",
+        (
+            (PostState.DRAFT, "publish", PostState.PUBLISHED),
+            (PostState.PUBLISHED, "archive", PostState.ARCHIVED),
+            (PostState.ARCHIVED, "draft", PostState.DRAFT),
+        ),
+    )
+    def test_should_transition_post_by_author(
+        self, client: Client, post, post_url, user, initial_state, transition, expected_state
+    ):
+        Post.objects.filter(pk=post.pk).update(state=initial_state)
+        client.force_login(user)
+        # WHEN the author runs the transition
+        response = client.post(f"{post_url}{transition}/")
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND only the changed fields are returned
+        assert set(response.data) == {"id", "state", "updated_at"}
+        assert response.data["state"] == expected_state
+        # AND the state is persisted
+        post.refresh_from_db()
+        assert post.state == expected_state
+
+    def test_should_forbid_transition_by_non_author(self, client: Client, post, post_url, user2):
+        client.force_login(user2)
+        response = client.post(f"{post_url}publish/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN, response.content
+        post.refresh_from_db()
+        assert post.state == PostState.DRAFT
+
+    def test_should_reject_transition_from_wrong_state(self, client: Client, post, post_url, user):
+        Post.objects.filter(pk=post.pk).update(state=PostState.ARCHIVED)
+        client.force_login(user)
+        response = client.post(f"{post_url}publish/")
+        assert response.status_code == status.HTTP_409_CONFLICT, response.content
+
+    def test_should_fail_to_transition_non_existing_post(
+        self, client: Client, missing_post_url, user
+    ):
+        client.force_login(user)
+        response = client.post(f"{missing_post_url}publish/")
+        assert response.status_code == status.HTTP_404_NOT_FOUND, response.content
+
+
+class TestPostFilterUrls:
+    @pytest.fixture(name="tagged_posts")
+    def given_tagged_posts(self, user):
+        # Posts tagged with: a, b, a+b and none
+        posts = Post.objects.bulk_create(Post(title=f"post-{i}", author=user) for i in range(4))
+        a, b = Tag.objects.bulk_create(Tag(name=name) for name in ["a", "b"])
+        PostTag.objects.replace(
+            {posts[0].pk: [a.pk], posts[1].pk: [b.pk], posts[2].pk: [a.pk, b.pk]}
+        )
+        return posts
+
+    @pytest.mark.parametrize(
+        "params,expected",
+        (
+            ({"tag": "a"}, [0, 2]),
+            ({"tag": "a,b"}, [2]),
+            ({"tag": "a,b", "tag_match": "all"}, [2]),
+            ({"tag": "a,b", "tag_match": "any"}, [0, 1, 2]),
+            ({"tag": "a,missing", "tag_match": "any"}, [0, 2]),
+            ({"tag": "a,missing"}, []),
+        ),
+        ids=["one", "all", "explicit-all", "any", "any-with-missing", "all-with-missing"],
+    )
+    def test_should_filter_posts_by_tags(
+        self, client: Client, tagged_posts, django_assert_max_num_queries, params, expected
+    ):
+        with django_assert_max_num_queries(MAX_POST_LIST_QUERIES):
+            response = client.get("/api/posts/", params)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert sorted(p["id"] for p in response.data["results"]) == [
+            tagged_posts[i].id for i in expected
+        ]
+
+    def test_should_filter_posts_by_author(self, client: Client, post, user2):
+        # GIVEN a post of another author
+        Post.objects.create(title="other", author=user2)
+        # WHEN posts are filtered by the first author
+        response = client.get("/api/posts/", {"author": post.author_id})
+        # THEN only their post is listed
+        assert [p["id"] for p in response.data["results"]] == [post.id]
+
+    def test_should_filter_posts_by_creation_range(self, client: Client, user):
+        # GIVEN posts created on three consecutive days
+        posts = Post.objects.bulk_create(Post(title=f"post-{i}", author=user) for i in range(3))
+        day = timedelta(days=1)
+        for i, p in enumerate(posts):
+            p.created_at -= (3 - i) * day
+        Post.objects.bulk_update(posts, ["created_at"])
+        # WHEN posts created strictly between the first and the last are requested
+        response = client.get(
+            "/api/posts/",
+            {
+                "created_after": posts[0].created_at.isoformat(),
+                "created_before": posts[2].created_at.isoformat(),
+            },
+        )
+        # THEN only the middle post is listed
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [p["id"] for p in response.data["results"]] == [posts[1].id]
+
+    def test_should_combine_filters(self, client: Client, tagged_posts, user):
+        published = tagged_posts[2]
+        published.state = PostState.PUBLISHED
+        published.save()
+        response = client.get(
+            "/api/posts/", {"tag": "a", "state": PostState.PUBLISHED, "author": user.id}
+        )
+        assert [p["id"] for p in response.data["results"]] == [published.id]
+
+    @pytest.mark.parametrize(
+        "params",
+        (
+            {"author": "me"},
+            {"created_after": "yesterday"},
+            {"created_before": "2024-02-30T00:00:00"},
+            {"tag": ","},
+            {"tag": ",".join(f"t{i}" for i in range(11))},
+            {"tag": "a", "tag_match": "some"},
+        ),
+        ids=[
+            "author",
+            "created_after",
+            "impossible-date",
+            "empty-tag",
+            "too-many-tags",
+            "tag_match",
+        ],
+    )
+    def test_should_reject_invalid_filters(self, client: Client, params):
+        response = client.get("/api/posts/", params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert set(response.data) <= set(params)
+
+
+class TestPostSearchUrls:
+    @pytest.fixture(name="search_url")
+    def given_search_url(self):
+        return "/api/posts/search/"
+
+    def test_should_rank_title_matches_first(
+        self, client: Client, search_url, user, django_assert_num_queries
+    ):
+        # GIVEN posts mentioning a word in the body, in the title or not at all
+        in_body, in_title, _ = Post.objects.bulk_create(
+            [
+                Post(title="Cooking", body="A recipe for django unchained", author=user),
+                Post(title="Django tips", body="Some tips", author=user),
+                Post(title="Flask", body="Nothing to see", author=user),
+            ]
+        )
+        # WHEN posts are searched in one query
+        with django_assert_num_queries(1):
+            response = client.get(search_url, {"q": "Django"})
+        # THEN only matching posts are found, the title match first
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [p["id"] for p in response.data] == [in_title.id, in_body.id]
+        assert response.data[0]["rank"] > response.data[1]["rank"]
+        assert response.data[0]["excerpt"] == "Some tips"
+
+    def test_should_match_all_words(self, client: Client, search_url, user):
+        both, _ = Post.objects.bulk_create(
+            [
+                Post(title="Django", body="with rest framework", author=user),
+                Post(title="Django", body="with templates", author=user),
+            ]
+        )
+        response = client.get(search_url, {"q": "django framework"})
+        assert [p["id"] for p in response.data] == [both.id]
+
+    def test_should_follow_post_updates_and_deletes(self, client: Client, search_url, post):
+        # GIVEN a post renamed through a queryset update
+        Post.objects.filter(pk=post.pk).update(title="Original")
+        Post.objects.filter(pk=post.pk).update(title="Renamed")
+        # THEN it is found by its new title only
+        assert [p["id"] for p in client.get(search_url, {"q": "renamed"}).data] == [post.id]
+        assert client.get(search_url, {"q": "original"}).data == []
+        # AND it is no longer found once deleted
+        post.delete()
+        assert client.get(search_url, {"q": "renamed"}).data == []
+
+    def test_should_apply_list_filters_and_limit(self, client: Client, search_url, user):
+        posts = Post.objects.bulk_create(
+            Post(title=f"django {i}", state=PostState.PUBLISHED, author=user) for i in range(3)
+        )
+        Post.objects.create(title="django draft", author=user)
+        response = client.get(search_url, {"q": "django", "state": "published", "limit": 2})
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert {p["id"] for p in response.data} < {p.id for p in posts}
+        assert len(response.data) == 2
+
+    def test_should_create_dropped_triggers_after_migrate(self, client: Client, search_url, user):
+        # GIVEN the index triggers were dropped, as by a rebuild of posts_post on SQLite
+        with connection.cursor() as cursor:
+            for name in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS posts_post_fts_{name}")
+        # WHEN migrations are done
+        emit_post_migrate_signal(verbosity=0, interactive=False, db=connection.alias)
+        # THEN new posts are indexed again
+        post = Post.objects.create(title="Reindexed", author=user)
+        assert [p["id"] for p in client.get(search_url, {"q": "reindexed"}).data] == [post.id]
+
+    @pytest.mark.parametrize("q", ['"', "NOT", "a OR b", "title:x", "near(", "*"])
+    def test_should_treat_query_syntax_as_words(self, client: Client, search_url, post, q):
+        response = client.get(search_url, {"q": q})
+        assert response.status_code == status.HTTP_200_OK, response.content
+
+    @pytest.mark.parametrize("params", [{}, {"q": "  "}, {"q": "x", "limit": 0}])
+    def test_should_reject_invalid_search(self, client: Client, search_url, params):
+        response = client.get(search_url, params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+
+
+class TestPostTransitionUrls:
+    url = "/api/posts/transition/"
+
+    @pytest.mark.parametrize("posts_count", [1, 50])
+    def test_should_archive_many_posts_with_constant_number_of_queries(
+        self, client: Client, user, django_assert_max_num_queries, posts_count
+    ):
+        # GIVEN posts of the logged in user
+        posts = Post.objects.bulk_create(
+            Post(title=f"post-{i}", author=user) for i in range(posts_count)
+        )
+        client.force_login(user)
+        data = {"ids": [p.id for p in posts], "transition": "archive"}
+        # WHEN all posts are archived in one request
+        with django_assert_max_num_queries(5):
+            response = client.post(self.url, data=data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND every post is reported archived
+        assert response.data["results"] == [{"id": p.id, "result": "done"} for p in posts]
+        assert Post.objects.filter(state=PostState.ARCHIVED).count() == posts_count
+
+    def test_should_report_result_per_post(self, client: Client, user, user2):
+        # GIVEN a draft, an archived post and a post of another user
+        draft = Post.objects.create(author=user)
+        archived = Post.objects.create(author=user, state=PostState.ARCHIVED)
+        foreign = Post.objects.create(author=user2)
+        client.force_login(user)
+        data = {"ids": [draft.id, archived.id, foreign.id, 1001], "transition": "publish"}
+        # WHEN the posts are published
+        response = client.post(self.url, data=data, content_type=CONTENT_TYPE)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND the outcome is reported for each requested id
+        assert response.data["results"] == [
+            {"id": draft.id, "result": "done"},
+            {"id": archived.id, "result": "not_allowed"},
+            {"id": foreign.id, "result": "forbidden"},
+            {"id": 1001, "result": "not_found"},
+        ]
+        # AND only the permitted post changed state
+        states = dict(Post.objects.values_list("id", "state"))
+        assert states == {
+            draft.id: PostState.PUBLISHED,
+            archived.id: PostState.ARCHIVED,
+            foreign.id: PostState.DRAFT,
+        }
+
+    def test_should_forbid_transitions_to_anonymous_user(self, client: Client, post):
+        data = {"ids": [post.id], "transition": "archive"}
+        response = client.post(self.url, data=data, content_type=CONTENT_TYPE)
+        assert response.data["results"] == [{"id": post.id, "result": "forbidden"}]
+        post.refresh_from_db()
+        assert post.state == PostState.DRAFT
+
+    def test_should_reject_unknown_transition(self, client: Client, post, user):
+        client.force_login(user)
+        data = {"ids": [post.id], "transition": "delete"}
+        response = client.post(self.url, data=data, content_type=CONTENT_TYPE)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "transition" in response.data
+
+    def test_should_refresh_feed_after_bulk_publish(self, client: Client, feed_url, post, user):
+        # GIVEN the feed was cached without the draft post
+        client.get(feed_url)
+        client.force_login(user)
+        # WHEN the post is published in bulk
+        client.post(
+            self.url, data={"ids": [post.id], "transition": "publish"}, content_type=CONTENT_TYPE
+        )
+        # THEN the post appears in the feed
+        response = client.get(feed_url)
+        assert [p["id"] for p in response.data["results"]] == [post.id]
+
+
+class TestFastLists:
+    TRICKY_TEXT = 'Ünïcödé "quoted" \\ back\tslash \u2028\u2029 \x1f </script> 😀'
+
+    @pytest.fixture(autouse=True)
+    def given_tricky_content(self, user, user2):
+        posts = [
+            Post.objects.create(
+                title=f"{i} {self.TRICKY_TEXT}"[:50], body=self.TRICKY_TEXT * i, author=user
+            )
+            for i in range(1, 6)
+        ]
+        Post.objects.filter(pk=posts[0].pk).update(state=PostState.PUBLISHED)
+        for post in posts:
+            Comment.objects.create(post=post, author=user2, body=self.TRICKY_TEXT)
+        Tag.objects.bulk_create(Tag(name=f"{i} {self.TRICKY_TEXT}"[:30]) for i in range(5))
+        return posts
+
+    @pytest.mark.parametrize(
+        "url",
+        (
+            "/api/posts/",
+            "/api/posts/?page_size=2",
+            "/api/posts/?state=published",
+            "/api/comments/?page_size=3",
+            "/api/tags/?page_size=2",
+            "/api/tags/",
+        ),
+    )
+    def test_should_render_same_bytes_as_serializers(self, client: Client, settings, url):
+        # GIVEN the response of the serializer path
+        settings.POSTS_FAST_LISTS = False
+        expected = client.get(url)
+        # WHEN the same list is served by the fast path
+        settings.POSTS_FAST_LISTS = True
+        response = client.get(url)
+        # THEN the responses are byte-identical
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.content == expected.content
+        assert response["Content-Type"] == expected["Content-Type"]
+
+    def test_should_not_use_serializers(self, client: Client, settings, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("serializer used")
+
+        monkeypatch.setattr(PostSummarySerializer, "to_representation", fail)
+        settings.POSTS_FAST_LISTS = True
+        response = client.get("/api/posts/")
+        assert response.status_code == status.HTTP_200_OK, response.content
+
+    def test_should_render_same_bytes_for_next_page(self, client: Client, settings):
+        settings.POSTS_FAST_LISTS = False
+        expected = client.get(client.get("/api/posts/?page_size=2").data["next"])
+        settings.POSTS_FAST_LISTS = True
+        response = client.get(client.get("/api/posts/?page_size=2").json()["next"])
+        assert response.content == expected.content
+
+    def test_should_render_same_bytes_for_post_comments(
+        self, client: Client, settings, given_tricky_content
+    ):
+        url = f"/api/posts/{given_tricky_content[0].id}/comments/"
+        settings.POSTS_FAST_LISTS = False
+        expected = client.get(url)
+        settings.POSTS_FAST_LISTS = True
+        assert client.get(url).content == expected.content
+
+
+class TestConditionalRequests:
+    @pytest.mark.parametrize("url_fixture", ["post_url", "comment_url"])
+    def test_should_emit_validators(self, client: Client, request, url_fixture, comment):
+        url = request.getfixturevalue(url_fixture)
+        # WHEN a resource is fetched
+        response = client.get(url)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND it carries validators
+        assert response["ETag"]
+        assert response["Last-Modified"]
+
+    def test_should_emit_only_etag_for_lists(self, client: Client, comments_url, comment):
+        # WHEN a list is fetched
+        response = client.get(comments_url)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND it carries an ETag but no Last-Modified
+        assert response["ETag"]
+        assert not response.has_header("Last-Modified")
+
+    def test_should_change_etag_after_direct_link_change(
+        self, client: Client, post_url, post, tag
+    ):
+        # GIVEN a previously fetched post
+        etag = client.get(post_url)["ETag"]
+        # WHEN a link to a tag is written directly
+        PostTag.objects.create(post=post, tag=tag)
+        # THEN the post is sent again, with the tag
+        response = client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert [t["id"] for t in response.data["tags"]] == [tag.id]
+
+    def test_should_emit_validators_for_post_list(self, client: Client, post):
+        response = client.get("/api/posts/")
+        assert response["ETag"]
+        assert not response.has_header("Last-Modified")
+
+    @pytest.mark.parametrize("url_fixture", ["post_url", "comment_url", "comments_url"])
+    def test_should_answer_matching_etag_with_not_modified(
+        self, client: Client, request, url_fixture, comment, django_assert_num_queries
+    ):
+        url = request.getfixturevalue(url_fixture)
+        # GIVEN a previously fetched resource
+        etag = client.get(url)["ETag"]
+        # WHEN it is fetched again with its ETag
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        # THEN only the validators are queried and nothing is sent back
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+
+    def test_should_answer_unmodified_since_with_not_modified(self, client: Client, post_url):
+        # GIVEN a previously fetched post
+        last_modified = client.get(post_url)["Last-Modified"]
+        # WHEN it is fetched again if modified since then
+        response = client.get(post_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        # THEN it is not sent again
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_should_send_post_again_after_update(self, client: Client, post, post_url):
+        # GIVEN a previously fetched post
+        etag = client.get(post_url)["ETag"]
+        # WHEN the post is updated
+        post.title = "Updated Post"
+        post.save()
+        # THEN it is sent again with a new ETag
+        response = client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response["ETag"] != etag
+        assert response.data["title"] == "Updated Post"
+
+    def test_should_send_post_again_after_tagging(self, client: Client, post, post_url, tag):
+        # GIVEN a previously fetched post
+        etag = client.get(post_url)["ETag"]
+        # WHEN the post is tagged
+        post.tags.add(tag)
+        # THEN it is sent again with the tag
+        response = client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [t["id"] for t in response.data["tags"]] == [tag.id]
+
+    def test_should_send_post_again_after_tag_rename(
+        self, client: Client, post_with_tag, post_url, tag
+    ):
+        # GIVEN a previously fetched tagged post
+        etag = client.get(post_url)["ETag"]
+        # WHEN the tag is renamed
+        tag.name = "Renamed"
+        tag.save()
+        # THEN the post is sent again with the new tag name
+        response = client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [t["name"] for t in response.data["tags"]] == ["Renamed"]
+
+    def test_should_send_list_again_after_delete(self, client: Client, comments_url, post, user):
+        # GIVEN a previously fetched list of two comments
+        first_comment = Comment.objects.create(post=post, author=user)
+        Comment.objects.create(post=post, author=user)
+        etag = client.get(comments_url)["ETag"]
+        # WHEN the oldest comment is deleted
+        first_comment.delete()
+        # THEN the list is sent again
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert len(response.data["results"]) == 1
+
+    def test_should_send_list_again_after_delete_if_modified_since(
+        self, client: Client, post, user
+    ):
+        # GIVEN a previously fetched list of two posts
+        newer_post = Post.objects.create(author=user)
+        client.get("/api/posts/")
+        # WHEN the older post is deleted
+        post.delete()
+        # THEN the list is sent again when asked if modified since the remaining post
+        since = http_date(newer_post.updated_at.timestamp() + 1)
+        response = client.get("/api/posts/", HTTP_IF_MODIFIED_SINCE=since)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert len(response.data["results"]) == 1
+
+    def test_should_send_page_again_after_next_page_empties(self, client: Client, post, user):
+        # GIVEN a previously fetched first page, followed by a page of the older post
+        Post.objects.create(author=user)
+        etag = client.get("/api/posts/?page_size=1")["ETag"]
+        # WHEN the post on the next page is deleted
+        post.delete()
+        # THEN the first page is sent again, without a next link
+        response = client.get("/api/posts/?page_size=1", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.data["next"] is None
+
+    def test_should_read_only_the_requested_page_for_validators(
+        self, client: Client, user, django_assert_num_queries
+    ):
+        # GIVEN more posts than fit on a page
+        Post.objects.bulk_create(Post(author=user) for _ in range(5))
+        etag = client.get("/api/posts/?page_size=2")["ETag"]
+        # WHEN the page is fetched again with its ETag
+        with django_assert_num_queries(1) as captured:
+            response = client.get("/api/posts/?page_size=2", HTTP_IF_NONE_MATCH=etag)
+        # THEN it is not sent again
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        # AND only the rows of the page, and one to look ahead, are read
+        (query,) = captured.captured_queries
+        assert "LIMIT 3" in query["sql"]
+        assert "COUNT" not in query["sql"].upper()
+
+    def test_should_use_distinct_etags_for_distinct_pages(self, client: Client, post, user):
+        Post.objects.create(author=user)
+        # WHEN two different pages of the same list are fetched
+        first_page = client.get("/api/posts/?page_size=1")
+        second_page = client.get(first_page.data["next"])
+        # THEN their ETags differ
+        assert first_page["ETag"] != second_page["ETag"]
+
+
+class TestFeedUrls:
+    def test_should_list_only_published_posts_newest_first(
+        self, client: Client, feed_url, post, published_post, user
+    ):
+        # GIVEN another published post, newer than published_post
+        newer_post = Post.objects.create(title="newer", author=user, state=PostState.PUBLISHED)
+        # WHEN the feed is listed
+        response = client.get(feed_url)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND only published posts are listed, newest first
+        actual_ids = [p["id"] for p in response.data["results"]]
+        assert actual_ids == [newer_post.id, published_post.id]
+
+    def test_should_not_cache_page_read_before_concurrent_write(
+        self, client: Client, feed_url, published_post, user, monkeypatch
+    ):
+        # GIVEN a post published while the feed page is being serialized
+        get_serializer = FeedViewSet.get_serializer
+        written = []
+
+        def get_serializer_during_write(view, *args, **kwargs):
+            if not written:
+                written.append(Post.objects.create(author=user, state=PostState.PUBLISHED))
+            return get_serializer(view, *args, **kwargs)
+
+        monkeypatch.setattr(FeedViewSet, "get_serializer", get_serializer_during_write)
+        client.get(feed_url)
+        # WHEN the feed is read again
+        response = client.get(feed_url)
+        # THEN it shows the new post
+        actual_ids = [p["id"] for p in response.data["results"]]
+        assert actual_ids == [written[0].id, published_post.id]
+
+    def test_should_refresh_feed_after_direct_link_change(
+        self, client: Client, feed_url, published_post, tag
+    ):
+        # GIVEN the feed was cached with an untagged post
+        client.get(feed_url)
+        # WHEN a link is written directly
+        PostTag.objects.create(post=published_post, tag=tag)
+        # THEN the feed shows the tag
+        (actual_post_data,) = client.get(feed_url).data["results"]
+        assert [t["id"] for t in actual_post_data["tags"]] == [tag.id]
+
+    def test_should_serve_repeated_feed_reads_from_cache(
+        self, client: Client, feed_url, published_post, django_assert_num_queries
+    ):
+        # GIVEN the feed was read once
+        first_response = client.get(feed_url)
+        # WHEN the feed is read again
+        with django_assert_num_queries(0):
+            response = client.get(feed_url)
+        # THEN the same page is returned without querying the database
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.data == first_response.data
+
+    @pytest.mark.parametrize("transition", ["archive", "draft"])
+    def test_should_refresh_feed_after_transition(
+        self, client: Client, feed_url, published_post, transition
+    ):
+        # GIVEN the feed was cached with the published post
+        client.get(feed_url)
+        # WHEN the post leaves the published state
+        getattr(published_post, transition)()
+        published_post.save()
+        # THEN the post is no longer in the feed
+        response = client.get(feed_url)
+        assert response.data["results"] == []
+
+    def test_should_refresh_feed_after_publish(self, client: Client, feed_url, post):
+        # GIVEN the feed was cached without the draft post
+        client.get(feed_url)
+        # WHEN the post is published
+        post.publish()
+        post.save()
+        # THEN the post appears in the feed
+        response = client.get(feed_url)
+        assert [p["id"] for p in response.data["results"]] == [post.id]
+
+    def test_should_refresh_feed_after_tag_change(
+        self, client: Client, feed_url, published_post, tag
+    ):
+        # GIVEN the feed was cached with an untagged post
+        client.get(feed_url)
+        # WHEN the post is tagged
+        published_post.tags.add(tag)
+        # THEN the feed shows the tag
+        response = client.get(feed_url)
+        (actual_post_data,) = response.data["results"]
+        assert [t["id"] for t in actual_post_data["tags"]] == [tag.id]
+
+    def test_should_refresh_feed_after_comment_change(
+        self, client: Client, feed_url, published_post, user, django_assert_max_num_queries
+    ):
+        # GIVEN the feed was cached
+        client.get(feed_url)
+        # WHEN a comment is added to the post
+        Comment.objects.create(post=published_post, author=user)
+        # THEN the feed is rebuilt from the database
+        with django_assert_max_num_queries(MAX_POST_LIST_QUERIES) as captured:
+            client.get(feed_url)
+        assert len(captured) > 0
+
+
+class TestPostDetailCache:
+    def test_should_serve_repeated_reads_from_cache(
+        self, client: Client, post_url, post_with_tag, django_assert_num_queries
+    ):
+        # GIVEN the post was read once
+        first_response = client.get(post_url)
+        # WHEN it is read again
+        with django_assert_num_queries(1):
+            response = client.get(post_url)
+        # THEN only its updated_at is queried and the same data is returned
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.json() == first_response.json()
+        assert get_post_detail_stats() == {"hits": 1, "misses": 1}
+
+    def test_should_not_cache_sparse_fieldsets(self, client: Client, post_url):
+        client.get(post_url, {"fields": "id,title"})
+        assert client.get(post_url).json()["body"] == ""
+        assert get_post_detail_stats() == {"hits": 0, "misses": 1}
+
+    @pytest.mark.parametrize(
+        "change",
+        (
+            pytest.param(lambda post, tag, user: post.save(), id="save"),
+            pytest.param(lambda post, tag, user: post.tags.add(tag), id="tag-add"),
+            pytest.param(
+                lambda post, tag, user: PostTag.objects.replace({post.pk: [tag.pk]}),
+                id="tag-replace",
+            ),
+            pytest.param(
+                lambda post, tag, user: Post.objects.bulk_transition("publish", [post.pk], user),
+                id="bulk-transition",
+            ),
+            pytest.param(
+                lambda post, tag, user: Comment.objects.create(post=post, author=user),
+                id="comment",
+            ),
+            pytest.param(lambda post, tag, user: Post.objects.all().touch(), id="touch"),
+        ),
+    )
+    def test_should_refresh_after_change(self, client: Client, post_url, post, tag, user, change):
+        # GIVEN the post was cached
+        client.get(post_url)
+        # WHEN it changes
+        post.title = "changed"
+        Post.objects.filter(pk=post.pk).update(title="changed")
+        change(post, tag, user)
+        # THEN the current post is served
+        assert client.get(post_url).json()["title"] == "changed"
+        assert get_post_detail_stats()["misses"] == 2
+
+    def test_should_refresh_after_direct_link_writes(self, client: Client, post_url, post, tag):
+        # GIVEN the untagged post was cached
+        client.get(post_url)
+        # WHEN a link is created directly
+        link = PostTag.objects.create(post=post, tag=tag)
+        # THEN the post is served with the tag
+        assert [t["id"] for t in client.get(post_url).json()["tags"]] == [tag.id]
+        # WHEN the link is deleted directly
+        link.delete()
+        # THEN the post is served without it
+        assert client.get(post_url).json()["tags"] == []
+        assert get_post_detail_stats() == {"hits": 0, "misses": 3}
+
+    def test_should_refresh_after_transition(self, client: Client, post_url, post, user):
+        client.get(post_url)
+        client.force_login(user)
+        client.post(f"{post_url}publish/")
+        assert client.get(post_url).json()["state"] == PostState.PUBLISHED
+
+    def test_should_not_serve_deleted_post(self, client: Client, post_url, post):
+        client.get(post_url)
+        post.delete()
+        assert client.get(post_url).status_code == status.HTTP_404_NOT_FOUND
+
+
 class TestCommentUrls:
     def test_should_list_comments(self, client: Client, comments_url, comment):
         response = client.get(comments_url)
         # THEN request is successfull
         assert response.status_code == status.HTTP_200_OK, response.content
         # AND response contains all expected comments
-        (actual_data,) = response.data
+        (actual_data,) = response.data["results"]
         # AND acutal posts match expected
         assert comment.id == actual_data["id"]
 
+    def test_should_walk_comment_pages_oldest_first(self, client: Client, comments_url, post, user):
+        # GIVEN five comments
+        comments = [Comment.objects.create(post=post, author=user) for _ in range(5)]
+        # WHEN comments are listed two per page
+        actual_comments_data, pages = walk_pages(client, f"{comments_url}?page_size=2")
+        # THEN all comments are listed exactly once, oldest first
+        assert [c["id"] for c in actual_comments_data] == [c.id for c in comments]
+        # AND the listing spans three pages
+        assert pages == 3
+
     def test_should_create_comment(self, client: Client, comments_url, comment_data):
         response = client.post(comments_url, data=comment_data, content_type=CONTENT_TYPE)
         # THEN request is successfull
@@ -141,16 +1190,103 @@ class TestCommentUrls:
 
 
 
+class TestPostCommentUrls:
+    def test_should_list_only_comments_of_post(
+        self, client: Client, post_comments_url, post, comment, user
+    ):
+        # GIVEN a comment on another post
+        Comment.objects.create(post=Post.objects.create(author=user), author=user)
+        # WHEN the comments of the post are listed
+        response = client.get(post_comments_url)
+        # THEN request is successfull
+        assert response.status_code == status.HTTP_200_OK, response.content
+        # AND only the post's comment is listed
+        assert [c["id"] for c in response.data["results"]] == [comment.id]
+
+    def test_should_walk_post_comment_pages_with_constant_number_of_queries(
+        self, client: Client, post_comments_url, post, user, django_assert_max_num_queries
+    ):
+        comments = Comment.objects.bulk_create(Comment(post=post, author=user) for _ in range(5))
+        # WHEN the comments are listed two per page
+        with django_assert_max_num_queries(3 * 3):
+            actual_comments_data, pages = walk_pages(client, f"{post_comments_url}?page_size=2")
+        # THEN all comments are listed exactly once, oldest first
+        assert [c["id"] for c in actual_comments_data] == [c.id for c in comments]
+        assert pages == 3
+
+    def test_should_list_comments_since(
+        self, client: Client, post_comments_url, post, comment, user
+    ):
+        # GIVEN a client which has seen the first comment
+        since = comment.created_at.isoformat()
+        newer = Comment.objects.create(post=post, author=user)
+        # WHEN it polls for comments since then
+        response = client.get(post_comments_url, {"since": since})
+        # THEN only the new comment is listed
+        assert [c["id"] for c in response.data["results"]] == [newer.id]
+
+    @pytest.mark.parametrize("since", ["yesterday", "2024-13-01T00:00:00"])
+    def test_should_reject_invalid_since(self, client: Client, post_comments_url, since):
+        response = client.get(post_comments_url, {"since": since})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "since" in response.data
+
+    def test_should_fail_to_list_comments_of_non_existing_post(self, client: Client):
+        response = client.get("/api/posts/1001/comments/")
+        assert response.status_code == status.HTTP_404_NOT_FOUND, response.content
+
+
 class TestTagUrls:
     def test_should_list_tags(self, client: Client, tags_url, tag):
         response = client.get(tags_url)
         # THEN request is successfull
         assert response.status_code == status.HTTP_200_OK, response.content
         # AND response contains all expected tags
-        (actual_data,) = response.data
+        (actual_data,) = response.data["results"]
         # AND acutal tags match expected
         assert tag.id == actual_data["id"]
 
+    def test_should_walk_tag_pages_by_name(self, client: Client, tags_url):
+        # GIVEN five tags created out of name order
+        names = ["delta", "alpha", "echo", "charlie", "bravo"]
+        Tag.objects.bulk_create(Tag(name=name) for name in names)
+        # WHEN tags are listed two per page
+        actual_tags_data, pages = walk_pages(client, f"{tags_url}?page_size=2")
+        # THEN all tags are listed exactly once, ordered by name
+        assert [t["name"] for t in actual_tags_data] == sorted(names)
+        # AND the listing spans three pages
+        assert pages == 3
+
+    def test_should_list_popular_tags_in_one_query(
+        self, client: Client, tags_url, user, django_assert_num_queries
+    ):
+        # GIVEN tags used by a different number of posts
+        posts = Post.objects.bulk_create(Post(title=f"post-{i}", author=user) for i in range(3))
+        tags = Tag.objects.bulk_create(Tag(name=name) for name in ["a", "b", "c", "unused"])
+        PostTag.objects.replace(
+            {
+                posts[0].pk: [t.pk for t in tags[:3]],
+                posts[1].pk: [tags[1].pk],
+                posts[2].pk: [tags[1].pk, tags[2].pk],
+            }
+        )
+        # WHEN the two most popular tags are requested
+        with django_assert_num_queries(1):
+            response = client.get(f"{tags_url}popular/", {"limit": 2})
+        # THEN they are listed with their post counts, most used first
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert [(t["name"], t["post_count"]) for t in response.data] == [("b", 3), ("c", 2)]
+
+    def test_should_not_list_unused_popular_tags(self, client: Client, tags_url, tag):
+        response = client.get(f"{tags_url}popular/")
+        assert response.status_code == status.HTTP_200_OK, response.content
+        assert response.data == []
+
+    def test_should_reject_invalid_popular_tags_limit(self, client: Client, tags_url):
+        response = client.get(f"{tags_url}popular/", {"limit": 1000})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, response.content
+        assert "limit" in response.data
+
     def test_should_create_tag(self, client: Client, tags_url, tag_data):
         response = client.post(tags_url, data=tag_data, content_type=CONTENT_TYPE)
         # THEN request is successfull
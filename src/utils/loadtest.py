@@ -0,0 +1,177 @@
+"""Measure the throughput of an API endpoint under concurrent load.
+
+Serve the project from a fixed pool of threads, the way production WSGI
+servers do, then load an endpoint from another terminal::
+
+    python -m utils.loadtest serve --threads 8
+    python -m utils.loadtest run http://127.0.0.1:8000/api/posts/ -c 10
+
+``runserver`` starts a thread per request, so per-thread persistent database
+connections are never reused under it.
+
+``serve --asgi`` serves the ASGI application with uvicorn instead, from one
+event loop, so both can be compared; compare e.g. ``/api/posts/`` under WSGI
+with ``/api/async/posts/`` under ASGI.
+"""
+
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI server handling requests on a fixed pool of threads."""
+
+    threads = 8
+    request_queue_size = 1024
+
+    def server_activate(self):
+        super().server_activate()
+        self.pool = ThreadPoolExecutor(max_workers=self.threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def serve(host: str, port: int, threads: int):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogapi.settings")
+    from django.core.wsgi import get_wsgi_application
+
+    PooledWSGIServer.threads = threads
+    server = make_server(
+        host,
+        port,
+        get_wsgi_application(),
+        server_class=PooledWSGIServer,
+        handler_class=QuietWSGIRequestHandler,
+    )
+    print(f"Serving on http://{host}:{port}/ with {threads} threads")
+    server.serve_forever()
+
+
+def serve_asgi(host: str, port: int):
+    import uvicorn
+
+    print(f"Serving ASGI on http://{host}:{port}/")
+    # The project's ASGI application, which closes connections after requests.
+    uvicorn.run("blogapi.asgi:application", host=host, port=port, backlog=1024, log_level="warning")
+
+
+def fetch(url: str, timeout: float) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status < 400
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def run_worker(url: str, deadline: float, timeout: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        ok = fetch(url, timeout)
+        (latencies if ok else errors).append(time.perf_counter() - started)
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def load_test(url: str, concurrency: int, duration: float, timeout: float) -> dict:
+    """Request ``url`` from ``concurrency`` threads for ``duration`` seconds."""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(run_worker, url, deadline, timeout, latencies, errors)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Measure requests per second of an endpoint under concurrent load."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Serve the project over WSGI or ASGI.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="(default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8000, help="(default: 8000)")
+    serve_parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="Number of request handling threads (default: 8).",
+    )
+    serve_parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="Serve the ASGI application from an event loop instead.",
+    )
+
+    run_parser = commands.add_parser("run", help="Load an endpoint.")
+    run_parser.add_argument("url", help="The URL to request.")
+    run_parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Number of concurrent clients (default: 10).",
+    )
+    run_parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=10,
+        help="Seconds to run the test for (default: 10).",
+    )
+    run_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30,
+        help="Seconds to wait for one response (default: 30).",
+    )
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.asgi:
+            serve_asgi(args.host, args.port)
+        else:
+            serve(args.host, args.port, args.threads)
+        return
+    result = load_test(args.url, args.concurrency, args.duration, args.timeout)
+    print(
+        "{requests} requests, {errors} errors, {rps:.1f} requests/s, "
+        "latency p50 {p50:.3f}s p95 {p95:.3f}s p99 {p99:.3f}s".format(**result)
+    )
+
+
+if __name__ == "__main__":
+    main()